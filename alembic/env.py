@@ -50,6 +50,15 @@ target_metadata = [Base.metadata]
 # ... etc.
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave the full-text search objects created by raw DDL out of autogenerate."""
+    if type_ == "table" and name.startswith("tasks_fts"):
+        return False
+    if name in ("search_vector", "ix_tasks_search_vector"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -67,6 +76,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -76,7 +86,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,105 @@
+"""add task status counts
+
+Revision ID: 2f6b8d3c9a41
+Revises: e3a8f05b6c12
+Create Date: 2026-10-18 16:05:21.774390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b8d3c9a41'
+down_revision: Union[str, None] = 'e3a8f05b6c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGGERS = {
+    "sqlite": [
+        """
+        CREATE TRIGGER tasks_status_count_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO task_status_counts (user_id, status, task_count) VALUES (NEW.user_id, NEW.status, 1)
+            ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_delete AFTER DELETE ON tasks BEGIN
+            UPDATE task_status_counts SET task_count = task_count - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+            DELETE FROM task_status_counts WHERE user_id = OLD.user_id AND status = OLD.status AND task_count = 0;
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_update AFTER UPDATE OF user_id, status ON tasks
+        WHEN OLD.user_id IS NOT NEW.user_id OR OLD.status IS NOT NEW.status BEGIN
+            UPDATE task_status_counts SET task_count = task_count - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+            DELETE FROM task_status_counts WHERE user_id = OLD.user_id AND status = OLD.status AND task_count = 0;
+            INSERT INTO task_status_counts (user_id, status, task_count) VALUES (NEW.user_id, NEW.status, 1)
+            ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1;
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION tasks_status_count() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE task_status_counts SET task_count = task_count - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+                DELETE FROM task_status_counts WHERE user_id = OLD.user_id AND status = OLD.status AND task_count = 0;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO task_status_counts (user_id, status, task_count) VALUES (NEW.user_id, NEW.status, 1)
+                ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_status_counts.task_count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_insert_delete AFTER INSERT OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_status_count()
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_update AFTER UPDATE OF user_id, status ON tasks
+        FOR EACH ROW WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id OR OLD.status IS DISTINCT FROM NEW.status)
+        EXECUTE FUNCTION tasks_status_count()
+        """,
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    status = sa.Enum('NEW', 'IN_PROGRESS', 'DONE', name='taskstatus').with_variant(
+        postgresql.ENUM('NEW', 'IN_PROGRESS', 'DONE', name='taskstatus', create_type=False), 'postgresql'
+    )
+    op.create_table('task_status_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', status, nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'status')
+    )
+    op.execute(
+        "INSERT INTO task_status_counts (user_id, status, task_count) "
+        "SELECT user_id, status, count(*) FROM tasks GROUP BY user_id, status"
+    )
+    for statement in TRIGGERS[op.get_bind().dialect.name]:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER tasks_status_count_insert_delete ON tasks")
+        op.execute("DROP TRIGGER tasks_status_count_update ON tasks")
+        op.execute("DROP FUNCTION tasks_status_count()")
+    else:
+        op.execute("DROP TRIGGER tasks_status_count_insert")
+        op.execute("DROP TRIGGER tasks_status_count_delete")
+        op.execute("DROP TRIGGER tasks_status_count_update")
+    op.drop_table('task_status_counts')
@@ -0,0 +1,29 @@
+"""add task keyset order indexes
+
+Revision ID: 4c9e1a7d3f60
+Revises: d19f6a3e8b52
+Create Date: 2026-10-18 21:12:43.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c9e1a7d3f60'
+down_revision: Union[str, None] = 'd19f6a3e8b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_user_id_due_time_id', 'tasks', ['user_id', 'due_time', 'id'], unique=False)
+    op.create_index('ix_tasks_due_time_id', 'tasks', ['due_time', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_due_time_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_due_time_id', table_name='tasks')
@@ -0,0 +1,29 @@
+"""add task and history lookup indexes
+
+Revision ID: 5b7e2c91d4a3
+Revises: def9b15201f2
+Create Date: 2026-10-18 10:12:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c91d4a3'
+down_revision: Union[str, None] = 'def9b15201f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_user_id_status_due_time', 'tasks', ['user_id', 'status', 'due_time'], unique=False)
+    op.create_index('ix_task_history_task_id_created_at', 'task_history', ['task_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_history_task_id_created_at', table_name='task_history')
+    op.drop_index('ix_tasks_user_id_status_due_time', table_name='tasks')
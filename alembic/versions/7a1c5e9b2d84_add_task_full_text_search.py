@@ -0,0 +1,74 @@
+"""add task full text search
+
+Revision ID: 7a1c5e9b2d84
+Revises: 2f6b8d3c9a41
+Create Date: 2026-10-18 17:20:03.512977
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1c5e9b2d84'
+down_revision: Union[str, None] = '2f6b8d3c9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_DDL = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)",
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for statement in SEARCH_DDL[dialect]:
+        op.execute(statement)
+    if dialect == 'sqlite':
+        # Index the tasks that already exist, PostgreSQL computes the generated column itself.
+        op.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_tasks_search_vector', table_name='tasks')
+        op.drop_column('tasks', 'search_vector')
+    else:
+        op.execute("DROP TRIGGER tasks_fts_insert")
+        op.execute("DROP TRIGGER tasks_fts_delete")
+        op.execute("DROP TRIGGER tasks_fts_update")
+        op.execute("DROP TABLE tasks_fts")
@@ -0,0 +1,29 @@
+"""add task version counter
+
+Revision ID: 9c4d1a7e2f60
+Revises: 5b7e2c91d4a3
+Create Date: 2026-10-18 13:40:05.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d1a7e2f60'
+down_revision: Union[str, None] = '5b7e2c91d4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,42 @@
+"""add task history archive
+
+Revision ID: b5d2e8f1c3a7
+Revises: 7a1c5e9b2d84
+Create Date: 2026-10-18 18:02:44.193851
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d2e8f1c3a7'
+down_revision: Union[str, None] = '7a1c5e9b2d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    status = sa.Enum('NEW', 'IN_PROGRESS', 'DONE', name='taskstatus').with_variant(
+        postgresql.ENUM('NEW', 'IN_PROGRESS', 'DONE', name='taskstatus', create_type=False), 'postgresql'
+    )
+    op.create_table('task_history_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('status', status, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('due_time', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_history_archive_task_id_id', 'task_history_archive', ['task_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_history_archive_task_id_id', table_name='task_history_archive')
+    op.drop_table('task_history_archive')
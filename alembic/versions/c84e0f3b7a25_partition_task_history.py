@@ -0,0 +1,95 @@
+"""partition task history by month (PostgreSQL, optional)
+
+Only runs when asked for, on PostgreSQL:
+
+    alembic -x partition_history=true upgrade head
+
+task_history becomes a table partitioned by range on created_at, with one
+partition per month from the oldest row to HISTORY_PARTITION_MONTHS_AHEAD
+months ahead and a default partition. The retention job keeps creating the
+coming months. The primary key becomes (id, created_at), as PostgreSQL
+requires the partition key in it.
+
+Revision ID: c84e0f3b7a25
+Revises: b5d2e8f1c3a7
+Create Date: 2026-10-18 18:31:09.660412
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c84e0f3b7a25'
+down_revision: Union[str, None] = 'b5d2e8f1c3a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONTHS_AHEAD = 3
+INDEXES = {
+    'ix_task_history_task_id_created_at': '(task_id, created_at)',
+    'ix_task_history_task_id_id': '(task_id, id)',
+}
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    month = moment.month - 1 + months
+    return datetime(moment.year + month // 12, month % 12 + 1, 1)
+
+
+def is_partitioned() -> bool:
+    return bool(op.get_bind().scalar(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'task_history'"
+    )))
+
+
+def swap_table(partition_by: str) -> None:
+    """Recreate task_history, partitioned or not, and copy its rows over."""
+    op.execute("ALTER TABLE task_history RENAME TO task_history_old")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+    op.execute(f"CREATE TABLE task_history (LIKE task_history_old INCLUDING DEFAULTS) {partition_by}")
+    op.execute("ALTER SEQUENCE task_history_id_seq OWNED BY task_history.id")
+
+
+def finish_swap(primary_key: str) -> None:
+    op.execute("INSERT INTO task_history SELECT * FROM task_history_old")
+    op.execute("DROP TABLE task_history_old")
+    op.execute(f"ALTER TABLE task_history ADD PRIMARY KEY {primary_key}")
+    op.execute("ALTER TABLE task_history ADD FOREIGN KEY (task_id) REFERENCES tasks (id)")
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON task_history {columns}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    requested = context.get_x_argument(as_dictionary=True).get('partition_history') == 'true'
+    if op.get_bind().dialect.name != 'postgresql' or not requested or is_partitioned():
+        return
+
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM task_history"))
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    swap_table("PARTITION BY RANGE (created_at)")
+    start = month_start(oldest or now)
+    while start < month_start(now, MONTHS_AHEAD + 1):
+        end = month_start(start, 1)
+        op.execute(
+            f"CREATE TABLE task_history_{start:%Y_%m} PARTITION OF task_history "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        start = end
+    op.execute("CREATE TABLE task_history_default PARTITION OF task_history DEFAULT")
+    finish_swap("(id, created_at)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql' or not is_partitioned():
+        return
+    swap_table("")
+    finish_swap("(id)")
@@ -0,0 +1,27 @@
+"""add task status due time index
+
+Revision ID: d19f6a3e8b52
+Revises: c84e0f3b7a25
+Create Date: 2026-10-18 19:24:05.871230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd19f6a3e8b52'
+down_revision: Union[str, None] = 'c84e0f3b7a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_status_due_time', 'tasks', ['status', 'due_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_status_due_time', table_name='tasks')
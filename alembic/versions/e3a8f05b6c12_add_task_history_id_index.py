@@ -0,0 +1,27 @@
+"""add task history id index
+
+Revision ID: e3a8f05b6c12
+Revises: 9c4d1a7e2f60
+Create Date: 2026-10-18 15:12:47.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8f05b6c12'
+down_revision: Union[str, None] = '9c4d1a7e2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_task_history_task_id_id', 'task_history', ['task_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_history_task_id_id', table_name='task_history')
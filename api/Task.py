@@ -1,12 +1,28 @@
-from datetime import datetime
-from fastapi import Depends, HTTPException, status, APIRouter
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from fastapi import Body, Depends, Header, HTTPException, Query, Response, status, APIRouter
 from db.database import get_async_session
+from sqlalchemy import delete, func, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from db.models import Task, User, TaskHistory
-from db.schemas import TaskCreate, TaskUpdate, TaskResponse
-from typing import List, Optional
+from db.models import Task, User, TaskHistory, TaskStatusCount
+from db.replicas import replicas
+from db.schemas import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskPage, TaskStats, TaskDueStats,
+    TaskBulkUpdate, TaskBulkDelete, TaskBulkResponse, TaskBulkDeleteResponse, BulkItemError
+)
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from decouple import Csv, config
 from .auth import current_user
+from .pagination import PageParams, paginate_search, paginate_tasks, search_page, task_page
+from .search import search_tasks_query
+from .etag import weak_etag, etag_matches
+from .cache import task_list_cache
+from .events import task_events
+from .history_writer import history_writer
+from .serialization import list_adapter, page_json, parse_fields, projection, schema_columns
+from .sessions import get_read_session
 from db.types import TaskStatus
 from fastapi_filter import FilterDepends
 from fastapi_filter.contrib.sqlalchemy import Filter
@@ -23,50 +39,173 @@ class TaskFilter(Filter):
         model = Task
 
 
+MAX_BULK_SIZE = config('MAX_BULK_SIZE', default=1000, cast=int)
+TASK_STATS_DUE_SOON_HOURS = config('TASK_STATS_DUE_SOON_HOURS', default='24,168', cast=Csv(int))
+
+
 router = APIRouter()
 
 
-@router.get("/all_tasks/", response_model=List[TaskResponse])
+def task_fields(
+    fields: Optional[str] = Query(None, description="Comma separated task fields to return, all by default")
+) -> Tuple[str, ...]:
+    return parse_fields(fields, TaskResponse)
+
+
+def task_list_columns(fields: Tuple[str, ...]) -> list:
+    '''Columns for the selected fields, plus the (due_time, id) sort key the cursor needs.'''
+    return [getattr(Task, name) for name in dict.fromkeys((*fields, "due_time", "id"))]
+
+
+def user_tasks_query(user_id: int, task_filter: TaskFilter, fields: Tuple[str, ...] = tuple(TaskResponse.model_fields)):
+    '''Build the filtered task query for a single user, selecting only the requested fields.
+    Served by the (user_id, status, due_time) index, or by (user_id, due_time, id) without a status.'''
+    return task_filter.filter(select(*task_list_columns(fields)).where(Task.user_id == user_id))
+
+
+@router.get("/all_tasks/", response_model=TaskPage)
 async def get_task_list(
     task_filter: TaskFilter = FilterDepends(TaskFilter),
-    session: AsyncSession = Depends(get_async_session),
+    page: PageParams = Depends(),
+    fields: Tuple[str, ...] = Depends(task_fields),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(current_user)
 ):
-    '''Get a list of all tasks.
-    Return a list of tasks filtered by optional filters.'''
+    '''Get a page of all tasks.
+    Return tasks filtered by optional filters, ordered by due time.
+    Pass next_cursor back as cursor to get the following page.
+    Pass fields to only select and return some of the task fields.
+    Read from a replica when DB_REPLICA_URLS is set.'''
     
-    tasks = select(Task)
-    query = task_filter.filter(tasks)
+    tasks = select(*task_list_columns(fields))
+    query = paginate_tasks(task_filter.filter(tasks), page)
     result = await session.execute(query)
-    return result.scalars().all()
+    body = task_page(result.all(), page)
+    return Response(
+        content=page_json(list_adapter(projection(TaskResponse, fields)), body["items"], body["next_cursor"]),
+        media_type="application/json"
+    )
 
-@router.get("/tasks/", response_model=List[TaskResponse])
+@router.get("/tasks/", response_model=TaskPage)
 async def get_user_task_list(
     task_filter: TaskFilter = FilterDepends(TaskFilter),
+    q: Optional[str] = Query(None, min_length=1, description="Full-text search in title and description, results are ranked"),
+    page: PageParams = Depends(),
+    fields: Tuple[str, ...] = Depends(task_fields),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(current_user)
+):
+    '''Get a page of tasks for the current user.
+    Return tasks filtered by the current user and optional filters, ordered by due time.
+    Pass next_cursor back as cursor to get the following page.
+    Pass fields to only select and return some of the task fields.
+    With q, matching tasks are ordered by relevance instead of due time.
+    Pages are served from task_list_cache until one of the user's tasks changes,
+    misses are read from a replica when DB_REPLICA_URLS is set. A page read from a
+    replica may miss a write made through another worker, so it is only cached for
+    the stickiness window.'''
+
+    cache_key = await task_list_cache.key(current_user.id, {
+        "filter": task_filter.model_dump(mode="json", exclude_none=True),
+        "q": q,
+        "cursor": page.cursor,
+        "limit": page.limit,
+        "fields": fields,
+    })
+    body = await task_list_cache.get(cache_key)
+    if body is None:
+        if q is None:
+            query = paginate_tasks(user_tasks_query(current_user.id, task_filter, fields), page)
+            tasks = task_page((await session.execute(query)).all(), page)
+        else:
+            dialect = session.get_bind().dialect.name
+            query = task_filter.filter(search_tasks_query(dialect, current_user.id, q, task_list_columns(fields)))
+            tasks = search_page((await session.execute(paginate_search(query, page))).all(), page)
+        body = page_json(list_adapter(projection(TaskResponse, fields)), tasks["items"], tasks["next_cursor"])
+        await task_list_cache.set(cache_key, body, replicas.stickiness if session.info.get("replica") else None)
+    return Response(content=body, media_type="application/json")
+
+def task_due_counts_query(user_id: int, now: datetime, horizons: List[datetime]):
+    '''Count a user's unfinished tasks that are overdue, then those due before each horizon.
+    Served by the (user_id, status, due_time) index without reading table rows.'''
+    return select(
+        func.count().filter(Task.due_time < now),
+        *(func.count().filter(Task.due_time >= now, Task.due_time < until) for until in horizons)
+    ).where(
+        Task.user_id == user_id,
+        Task.status.in_([TaskStatus.NEW, TaskStatus.IN_PROGRESS]),
+        Task.due_time < max(horizons, default=now)
+    )
+
+
+@router.get("/tasks/stats/", response_model=TaskStats)
+async def get_task_stats(
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(current_user)
 ):
-    '''Get a list of tasks for the current user.
-    Return a list of tasks filtered by the current user and optional filters.'''
+    '''Count the current user's tasks by status.
+    Read from the counters kept by the task_status_counts triggers, tasks are never
+    scanned. Overdue and due soon counts are served by /tasks/stats/due/.'''
+
+    by_status = {task_status: 0 for task_status in TaskStatus}
+    rows = await session.execute(
+        select(TaskStatusCount.status, TaskStatusCount.task_count)
+        .where(TaskStatusCount.user_id == current_user.id)
+    )
+    for task_status, task_count in rows:
+        by_status[task_status] = task_count
+    return TaskStats(total=sum(by_status.values()), by_status=by_status)
+
+
+@router.get("/tasks/stats/due/", response_model=TaskDueStats)
+async def get_task_due_stats(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+):
+    '''Count the current user's unfinished tasks that are overdue and due within each
+    TASK_STATS_DUE_SOON_HOURS window.
+    These depend on the current time, so no counter can hold them: they are counted
+    on the (user_id, status, due_time) index, reading the unfinished tasks due before
+    the largest window.'''
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    horizons = {f"{hours}h": now + timedelta(hours=hours) for hours in TASK_STATS_DUE_SOON_HOURS}
+    due = (await session.execute(task_due_counts_query(current_user.id, now, list(horizons.values())))).one()
+    return TaskDueStats(overdue=due[0], due_soon=dict(zip(horizons, due[1:])))
 
-    tasks = select(Task).where(Task.user_id == current_user.id)
-    query = task_filter.filter(tasks)
-    result = await session.execute(query)
-    return result.scalars().all()
 
 @router.get("/task/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
+    fields: Tuple[str, ...] = Depends(task_fields),
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(current_user)
 ):
     '''Get a task by its ID.
-    Return exception if the task does not exist or does not belong to the current user.'''
+    Return exception if the task does not exist or does not belong to the current user.
+    Pass fields to only select and return some of the task fields.
+    Return 304 Not Modified when If-None-Match carries the current ETag.'''
 
-    task = await session.get(Task, task_id)
-    if not task or task.user_id != current_user.id:
+    row = (await session.execute(
+        select(*[getattr(Task, name) for name in fields], Task.version)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+    )).one_or_none()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found or does not belong to the user")
-    return task
+
+    etag = weak_etag("task", task_id, row.version, *fields)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(
+        content=projection(TaskResponse, fields).model_validate(row._asdict()).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+
+def _history_entries(tasks) -> List[dict]:
+    return [{"task_id": task.id, "status": task.status, "due_time": task.due_time} for task in tasks]
 
 
 @router.post("/task/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
@@ -88,15 +227,13 @@ async def create_task(
     session.add(new_task)
     await session.flush() 
 
-    task_history = TaskHistory(
-        task_id=new_task.id,
-        status=new_task.status,
-        due_time=new_task.due_time
-    )
-    session.add(task_history)
-
-    await session.commit()
+    await history_writer.commit(session, _history_entries([new_task]))
+    await task_list_cache.invalidate(current_user.id)
+    replicas.mark_write(current_user.id)
     await session.refresh(new_task)
+    await task_events.publish(current_user.id, "task.created", [
+        TaskResponse.model_validate(new_task, from_attributes=True).model_dump(mode="json")
+    ])
     return new_task
 
 
@@ -110,19 +247,24 @@ async def update_task(
 ):
     '''Update a task by its ID.
     Return exception if the task does not exist or does not belong to the current user.
+    The ownership check is part of the UPDATE, the returned row feeds the history entry.
     '''
 
-    task = await session.get(Task, task_id)
-    if not task or task.user_id != current_user.id:
+    result = await session.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+        .values(**task_update.model_dump(exclude_unset=True), version=Task.version + 1)
+        .returning(*schema_columns(Task, TaskResponse))
+    )
+    row = result.one_or_none()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    for key, value in task_update.model_dump(exclude_unset=True).items():
-        setattr(task, key, value)
-    task_history = TaskHistory(task_id=task.id, status=task.status, due_time=task.due_time)
-    session.add(task)
-    session.add(task_history)
-    await session.commit()
-    await session.refresh(task)
+    task = TaskResponse.model_validate(row, from_attributes=True)
+    await history_writer.commit(session, _history_entries([task]))
+    await task_list_cache.invalidate(current_user.id)
+    replicas.mark_write(current_user.id)
+    await task_events.publish(current_user.id, "task.updated", [task.model_dump(mode="json")])
     return task
 
 
@@ -135,11 +277,157 @@ async def delete_task(
     '''Delete a task by its ID.
     Return Exception if the task does not exist or does not belong to the current user.
     '''
-    task = await session.get(Task, task_id)
-    if not task or task.user_id != current_user.id:
+    owned = select(Task.id).where(Task.id == task_id, Task.user_id == current_user.id)
+
+    await session.execute(delete(TaskHistory).where(TaskHistory.task_id.in_(owned)))
+    result = await session.execute(
+        delete(Task)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+        .returning(Task.id)
+    )
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    await session.delete(task)
     await session.commit()
+    await task_list_cache.invalidate(current_user.id)
+    replicas.mark_write(current_user.id)
+    await task_events.publish(current_user.id, "task.deleted", [{"id": task_id}])
     return {"detail": "Task deleted successfully"}
 
+
+def _check_bulk_size(size: int):
+    if size > MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {MAX_BULK_SIZE} items"
+        )
+
+
+def _validate_items(payload: List[Dict[str, Any]], schema) -> tuple[list, List[BulkItemError]]:
+    '''Validate every item on its own so one bad item does not reject the whole batch.'''
+    valid, errors = [], []
+    for index, item in enumerate(payload):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errors.append(BulkItemError(
+                index=index,
+                id=item.get("id") if isinstance(item, dict) else None,
+                detail=exc.errors(include_url=False, include_context=False, include_input=False)
+            ))
+    return valid, errors
+
+
+@router.post("/tasks/bulk/", response_model=TaskBulkResponse)
+async def create_tasks_bulk(
+    payload: List[Dict[str, Any]] = Body(...),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+):
+    '''Create many tasks in one transaction.
+    Invalid items are reported in errors by their index, the valid ones are created.
+    Tasks and their history are written with one multi-row INSERT each.'''
+
+    _check_bulk_size(len(payload))
+    valid, errors = _validate_items(payload, TaskCreate)
+
+    items = []
+    if valid:
+        result = await session.execute(
+            insert(Task).returning(*schema_columns(Task, TaskResponse)),
+            [dict(user_id=current_user.id, **task_data.model_dump()) for _, task_data in valid]
+        )
+        items = sorted(
+            (TaskResponse.model_validate(row, from_attributes=True) for row in result),
+            key=lambda task: task.id
+        )
+
+    await history_writer.commit(session, _history_entries(items))
+    await task_list_cache.invalidate(current_user.id)
+    replicas.mark_write(current_user.id)
+    await task_events.publish(current_user.id, "task.created", [task.model_dump(mode="json") for task in items])
+    return {"items": items, "errors": errors}
+
+
+@router.put("/tasks/bulk/", response_model=TaskBulkResponse)
+async def update_tasks_bulk(
+    payload: List[Dict[str, Any]] = Body(...),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+):
+    '''Update many tasks in one transaction.
+    Every item needs the id of the task to update. Invalid items, ids given more
+    than once and tasks that do not exist or do not belong to the current user are
+    reported in errors.'''
+
+    _check_bulk_size(len(payload))
+    valid, errors = _validate_items(payload, TaskBulkUpdate)
+    # Neither update of a repeated id is applied, their order in the batch is no intent.
+    occurrences = Counter(task_update.id for _, task_update in valid)
+    errors.extend(
+        BulkItemError(index=index, id=task_update.id, detail="Task id repeated in the batch")
+        for index, task_update in valid
+        if occurrences[task_update.id] > 1
+    )
+    valid = [(index, task_update) for index, task_update in valid if occurrences[task_update.id] == 1]
+
+    # Locked, so a concurrent update cannot read the version incremented below.
+    result = await session.execute(
+        select(Task).where(
+            Task.id.in_([task_update.id for _, task_update in valid]),
+            Task.user_id == current_user.id
+        ).with_for_update()
+    )
+    tasks = {task.id: task for task in result.scalars()}
+
+    updated = []
+    for index, task_update in valid:
+        task = tasks.get(task_update.id)
+        if task is None:
+            errors.append(BulkItemError(index=index, id=task_update.id, detail="Task not found"))
+            continue
+        for key, value in task_update.model_dump(exclude_unset=True, exclude={"id"}).items():
+            setattr(task, key, value)
+        # Incremented in Python so the UPDATEs of a batch stay in one executemany.
+        task.version += 1
+        updated.append(task)
+    await session.flush()
+
+    items = [TaskResponse.model_validate(task, from_attributes=True) for task in updated]
+    await history_writer.commit(session, _history_entries(items))
+    await task_list_cache.invalidate(current_user.id)
+    replicas.mark_write(current_user.id)
+    await task_events.publish(current_user.id, "task.updated", [task.model_dump(mode="json") for task in items])
+    return {"items": items, "errors": errors}
+
+
+@router.post("/tasks/bulk/delete/", response_model=TaskBulkDeleteResponse)
+async def delete_tasks_bulk(
+    task_ids: TaskBulkDelete,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+):
+    '''Delete many tasks and their history in one transaction.
+    Ids of tasks that do not exist or do not belong to the current user are reported in errors.'''
+
+    _check_bulk_size(len(task_ids.ids))
+    owned = select(Task.id).where(Task.id.in_(task_ids.ids), Task.user_id == current_user.id)
+
+    await session.execute(delete(TaskHistory).where(TaskHistory.task_id.in_(owned)))
+    result = await session.execute(
+        delete(Task)
+        .where(Task.id.in_(task_ids.ids), Task.user_id == current_user.id)
+        .returning(Task.id)
+    )
+    deleted = set(result.scalars().all())
+    await session.commit()
+    await task_list_cache.invalidate(current_user.id)
+    replicas.mark_write(current_user.id)
+    await task_events.publish(current_user.id, "task.deleted", [{"id": task_id} for task_id in sorted(deleted)])
+
+    errors = [
+        BulkItemError(index=index, id=task_id, detail="Task not found")
+        for index, task_id in enumerate(task_ids.ids)
+        if task_id not in deleted
+    ]
+    return {"deleted": sorted(deleted), "errors": errors}
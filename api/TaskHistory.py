@@ -1,33 +1,122 @@
-from fastapi import Depends, HTTPException, status, APIRouter
-from sqlalchemy import delete, select
+from datetime import datetime
+from fastapi import Depends, Header, HTTPException, Query, Response, status, APIRouter
+from fastapi_filter import FilterDepends
+from sqlalchemy import delete, func, select
 from db.database import get_async_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import Task, User, TaskHistory
-from db.schemas import TaskHistoryResponse
-from typing import List
+from db.replicas import replicas
+from db.schemas import TaskHistoryList, TaskHistoryPage, TaskHistoryResponse
+from typing import List, Optional, Union
+from decouple import config
 from .auth import current_user
+from .Task import TaskFilter
+from .etag import weak_etag, etag_matches
+from .pagination import PageParams, paginate_history, history_page, parse_since
+from .sessions import get_read_session
+from .serialization import page_json, rows_json, schema_columns, task_history_list_adapter
+
+
+# Tasks covered by one latest history request.
+HISTORY_LATEST_MAX_TASKS = config('HISTORY_LATEST_MAX_TASKS', default=200, cast=int)
+HISTORY_LATEST_MAX_PER_TASK = config('HISTORY_LATEST_MAX_PER_TASK', default=50, cast=int)
 
 
 router = APIRouter()
 
-@router.get("/task/{task_id}/history/", response_model=List[TaskHistoryResponse])
+
+def task_history_query(task_id: int, since: Union[int, datetime, None] = None):
+    '''Build the history lookup for a task, optionally only entries newer than since.
+    Served by the (task_id, id) index, or (task_id, created_at) for a timestamp.'''
+    query = select(*schema_columns(TaskHistory, TaskHistoryResponse)).where(TaskHistory.task_id == task_id)
+    if isinstance(since, int):
+        query = query.where(TaskHistory.id > since)
+    elif isinstance(since, datetime):
+        query = query.where(TaskHistory.created_at > since)
+    return query
+
+
+@router.get("/task/{task_id}/history/", response_model=TaskHistoryPage)
 async def get_task_history(
     task_id: int,
-    session: AsyncSession = Depends(get_async_session),
+    since: Optional[str] = Query(None, description="Only return entries after this history id or ISO timestamp"),
+    page: PageParams = Depends(),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(current_user)
 ):
-    """Get the history of a specific task.
-    Ensure the task belongs to the current user."""
+    """Get a page of the history of a specific task, oldest entry first.
+    Ensure the task belongs to the current user.
+    Pass next_cursor back as cursor to get the following page, or poll with
+    since set to the last id seen to only get new entries.
+    Return 304 Not Modified when If-None-Match carries the current ETag.
+    Read from a replica when DB_REPLICA_URLS is set."""
     
     task = await session.get(Task, task_id)
     if not task or task.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    
-    history = await session.execute(
-        select(TaskHistory).where(TaskHistory.task_id == task_id)
+
+    query = paginate_history(task_history_query(task_id, parse_since(since)), page)
+    entries = (await session.execute(query)).all()
+
+    # History entries are never modified, so ids and creation times identify the page.
+    # The look-ahead row is included so the tag also changes when a next page appears.
+    etag = weak_etag("history", task_id, *((entry.id, entry.created_at) for entry in entries))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    body = history_page(entries, page)
+    return Response(
+        content=page_json(task_history_list_adapter, body["items"], body["next_cursor"]),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+
+def latest_history_query(user_id: int, task_ids: Optional[List[int]], task_filter: TaskFilter, per_task: int):
+    '''Select the last per_task history entries of each of the user's matching tasks,
+    newest first per task, in one windowed query. Ownership is part of the task subquery,
+    and the history rows are found through the task_id indexes.'''
+    tasks = task_filter.filter(select(Task.id).where(Task.user_id == user_id))
+    if task_ids is not None:
+        tasks = tasks.where(Task.id.in_(task_ids))
+    tasks = tasks.order_by(Task.due_time, Task.id).limit(HISTORY_LATEST_MAX_TASKS)
+
+    columns = schema_columns(TaskHistory, TaskHistoryResponse)
+    ranked = select(
+        *columns,
+        func.row_number().over(partition_by=TaskHistory.task_id, order_by=TaskHistory.id.desc()).label("position"),
+    ).where(TaskHistory.task_id.in_(tasks)).subquery()
+    return (
+        select(*(ranked.c[column.key] for column in columns))
+        .where(ranked.c.position <= per_task)
+        .order_by(ranked.c.task_id, ranked.c.id.desc())
+    )
+
+
+@router.get("/tasks/history/latest/", response_model=TaskHistoryList)
+async def get_latest_task_history(
+    task_id: Optional[List[int]] = Query(None, description="Tasks to include, repeat the parameter for several"),
+    task_filter: TaskFilter = FilterDepends(TaskFilter),
+    per_task: int = Query(5, ge=1, le=HISTORY_LATEST_MAX_PER_TASK),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(current_user)
+):
+    """Get the latest history entries of many tasks at once, ordered by task, newest first.
+    Tasks are chosen by task_id, the task filters, or both, and only the current
+    user's tasks are included. Without task_id the first HISTORY_LATEST_MAX_TASKS
+    matching tasks by due time are covered, tasks without history are left out."""
+
+    if task_id is not None and len(task_id) > HISTORY_LATEST_MAX_TASKS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {HISTORY_LATEST_MAX_TASKS} task_id values are allowed"
+        )
+    rows = (await session.execute(latest_history_query(current_user.id, task_id, task_filter, per_task))).all()
+    return Response(
+        content=b'{"items":' + rows_json(task_history_list_adapter, rows) + b'}',
+        media_type="application/json",
     )
-    
-    return history.scalars().all()
 
 # @router.post("/task/history/",
 #               response_model=TaskHistoryResponse,
@@ -62,22 +151,20 @@ async def delete_task_history(
     current_user: User = Depends(current_user)
 ):
     """Delete all history entries for a specific task.
-    Ensure the task belongs to the current user."""
+    Ensure the task belongs to the current user.
+    A task of another user and a task without history both delete no rows and return 404."""
 
-    task = await session.get(Task, task_id)
-    if not task or task.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found or you do not have permission to delete this history")
-    
-    history = await session.execute(
-        select(TaskHistory).where(TaskHistory.task_id == task_id)
+    result = await session.execute(
+        delete(TaskHistory).where(
+            TaskHistory.task_id == task_id,
+            TaskHistory.task_id.in_(select(Task.id).where(Task.id == task_id, Task.user_id == current_user.id))
+        )
     )
-    
-    if not history.scalars().all():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="history not found for this task")
-    
-    await session.execute(delete(TaskHistory).where(TaskHistory.task_id == task_id))
-    
+    if not result.rowcount:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="History not found for this task")
+
     await session.commit()
+    replicas.mark_write(current_user.id)
 
 
 @router.delete("/task/history/{history_id}/",
@@ -90,14 +177,14 @@ async def delete_task_history_by_id(
     """Delete a specific task history by its ID.
     Ensure the task belongs to the current user."""
 
-    history = await session.get(TaskHistory, history_id)
-    if not history:
+    result = await session.execute(
+        delete(TaskHistory).where(
+            TaskHistory.id == history_id,
+            TaskHistory.task_id.in_(select(Task.id).where(Task.user_id == current_user.id))
+        )
+    )
+    if not result.rowcount:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task history not found")
-    
-    task = await session.get(Task, history.task_id)
-    if not task or task.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found or you do not have permission to delete this history")
-    
-    await session.delete(history)
-    await session.commit()
 
+    await session.commit()
+    replicas.mark_write(current_user.id)
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi_users import FastAPIUsers, fastapi_users
+import jwt
+from functools import lru_cache
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi_users import FastAPIUsers, exceptions, fastapi_users, schemas
+from fastapi_users.jwt import decode_jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import User
@@ -7,20 +10,36 @@ from db.database import get_user_db, get_async_session
 from db.schemas import UserCreate, UserRegister, UserResponse
 from fastapi_users.manager import BaseUserManager, IntegerIDMixin
 from fastapi import Request
-from typing import Optional
+from fastapi.security import OAuth2PasswordRequestForm
+from typing import Any, Dict, Optional
 from decouple import config
 from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
+from .cache import TTLCache
+from .passwords import password_helper
 
 
 SECRET= config('SECRET')
+# "stateless" resolves the user from the token claims and the user cache,
+# "database" loads the user on every request through fastapi-users.
+AUTH_MODE = config('AUTH_MODE', default='stateless')
+USER_CACHE_SIZE = config('USER_CACHE_SIZE', default=10000, cast=int)
+USER_CACHE_TTL = config('USER_CACHE_TTL', default=60, cast=int)
 
 router = APIRouter()
 
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+@lru_cache(maxsize=None)
+def get_jwt_strategy() -> JWTStrategy:
+    return JWTStrategy(secret=SECRET, lifetime_seconds=3600 * 24 * 7)
+
+
 bearer_transport = BearerTransport(tokenUrl="auth/login")
 auth_backend = AuthenticationBackend(
     name="jwt",
     transport=bearer_transport,
-    get_strategy=lambda: JWTStrategy(secret=SECRET, lifetime_seconds=3600 * 24 * 7),
+    get_strategy=get_jwt_strategy,
 )
 
 
@@ -29,9 +48,69 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     reset_password_token_secret = SECRET
     verification_token_secret = SECRET
 
+    def __init__(self, user_db):
+        super().__init__(user_db, password_helper)
+
+    # create, authenticate and password updates are the fastapi-users versions with
+    # the hashing awaited on the password pool instead of run on the event loop.
+
+    async def create(
+        self, user_create: schemas.UC, safe: bool = False, request: Optional[Request] = None
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+        if await self.user_db.get_by_email(user_create.email) is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = user_create.create_update_dict() if safe else user_create.create_update_dict_superuser()
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await self.password_helper.hash_async(password)
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            await self.password_helper.hash_async(credentials.password)
+            return None
+
+        verified, updated_password_hash = await self.password_helper.verify_and_update_async(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        # The stored hash used another algorithm or cost, replace it.
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {key: value for key, value in update_dict.items() if key != "password"}
+            update_dict["hashed_password"] = await self.password_helper.hash_async(password)
+        return await super()._update(user, update_dict)
+
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.id} has registered.")
 
+    async def on_after_update(
+        self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None
+    ):
+        user_cache.invalidate(user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
     async def on_after_forgot_password(
         self, user: User, token: str, request: Optional[Request] = None
     ):
@@ -50,7 +129,37 @@ fastapi_users = FastAPIUsers[User, int](
     get_user_manager,
     [auth_backend]
 )
-current_user = fastapi_users.current_user()
+
+
+async def current_user_from_token(
+    token: Optional[str] = Depends(bearer_transport.scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> User:
+    """Resolve the user from the verified JWT claims.
+    The user row is served from user_cache and only loaded on a miss."""
+
+    strategy = get_jwt_strategy()
+    try:
+        data = decode_jwt(token, strategy.decode_key, strategy.token_audience, algorithms=[strategy.algorithm])
+        user_id = int(data["sub"])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await session.get(User, user_id)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        # Detach the row so commits in later requests cannot expire the cached copy.
+        session.expunge(user)
+        user_cache.set(user_id, user)
+    return user
+
+
+if AUTH_MODE == 'stateless':
+    current_user = current_user_from_token
+else:
+    current_user = fastapi_users.current_user()
 
 router = fastapi_users.get_auth_router(auth_backend)
 
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from decouple import config
+
+
+# Same setting as in main.py, the memory backend only invalidates the worker that wrote.
+WEB_WORKERS = config('WEB_WORKERS', default=os.cpu_count() or 1, cast=int)
+# memory: per-process LRU, single worker only, redis: shared through CACHE_REDIS_URL, none: disabled.
+# Off unless chosen, no backend is both shared and free of extra services.
+TASK_CACHE_BACKEND = config('TASK_CACHE_BACKEND', default='none')
+TASK_CACHE_SIZE = config('TASK_CACHE_SIZE', default=1024, cast=int)
+TASK_CACHE_TTL = config('TASK_CACHE_TTL', default=60, cast=int)
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='redis://localhost:6379/0')
+
+
+class TTLCache:
+    '''In-process LRU cache whose entries also expire after ttl seconds.
+    Not shared between workers, so ttl bounds how stale an entry can get elsewhere.'''
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class InMemoryCacheBackend:
+    '''Process-local backend, values live in a bounded TTLCache.
+    Counters take their values from one sequence shared by all keys, so a counter can
+    be dropped once it has not moved for ttl seconds: the values written under its
+    older generations have expired and its next value was never used by that key.'''
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self.values = TTLCache(maxsize=maxsize, ttl=ttl)
+        # key -> (last increment, value), least recently incremented first.
+        self.counters: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self.sequence = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self.counters:
+            return self.counters[key][1]
+        return self.values.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.values.set(key, value, min(ttl, self.ttl))
+
+    async def incr(self, key: str) -> int:
+        now = time.monotonic()
+        while self.counters:
+            oldest, (incremented_at, _) = next(iter(self.counters.items()))
+            if incremented_at + self.ttl >= now:
+                break
+            del self.counters[oldest]
+        self.sequence += 1
+        self.counters[key] = (now, self.sequence)
+        self.counters.move_to_end(key)
+        return self.sequence
+
+
+class RedisCacheBackend:
+    '''Backend for any client speaking the redis.asyncio API (GET, SET EX, INCR).'''
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class NullCacheBackend:
+    '''Backend used when caching is disabled, every lookup is a miss.'''
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        pass
+
+    async def incr(self, key: str) -> int:
+        return 0
+
+
+class ResponseCache:
+    '''Read-through cache of serialized responses, grouped in scopes (one per user).
+    Invalidating a scope bumps its generation, so entries written by reads that
+    started before the invalidation are never served afterwards.'''
+
+    def __init__(self, backend, namespace: str, ttl: int):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _generation_key(self, scope) -> str:
+        return f"{self.namespace}:{scope}:gen"
+
+    async def key(self, scope, params: dict) -> str:
+        '''Resolve the entry key for a scope and normalized request parameters.'''
+        generation = await self.backend.get(self._generation_key(scope))
+        raw = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+        return f"{self.namespace}:{scope}:{int(generation or 0)}:{digest}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        '''Store an entry, ttl only shortens the lifetime of the cache.'''
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl > 0:
+            await self.backend.set(key, value, ttl)
+
+    async def invalidate(self, scope):
+        await self.backend.incr(self._generation_key(scope))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def build_backend(name: str, workers: int = 1):
+    if name == 'memory':
+        if workers > 1:
+            raise ValueError("TASK_CACHE_BACKEND=memory cannot invalidate the other workers, use redis or none with WEB_WORKERS > 1")
+        return InMemoryCacheBackend(maxsize=TASK_CACHE_SIZE, ttl=TASK_CACHE_TTL)
+    if name == 'redis':
+        import redis.asyncio
+
+        return RedisCacheBackend(redis.asyncio.from_url(CACHE_REDIS_URL))
+    if name == 'none':
+        return NullCacheBackend()
+    raise ValueError(f"Unknown TASK_CACHE_BACKEND {name!r}, expected memory, redis or none")
+
+
+task_list_cache = ResponseCache(build_backend(TASK_CACHE_BACKEND, WEB_WORKERS), namespace="tasks", ttl=TASK_CACHE_TTL)
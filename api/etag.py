@@ -0,0 +1,20 @@
+import hashlib
+from typing import Optional
+
+
+def weak_etag(*parts) -> str:
+    '''Build a weak ETag from the values that change whenever the representation changes.'''
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    '''Weak comparison of an If-None-Match header against the current ETag.'''
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable, List, Optional
+
+from fastapi import Depends, Header, APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import make_url
+from decouple import config
+
+from db.models import User
+from .auth import current_user
+
+
+# memory: events stay in the worker that wrote them, postgres: LISTEN/NOTIFY fan-out to every worker.
+EVENTS_BACKEND = config('EVENTS_BACKEND', default='memory')
+EVENTS_CHANNEL = config('EVENTS_CHANNEL', default='task_events')
+# Events kept per user for clients resuming with Last-Event-ID.
+EVENTS_BUFFER_SIZE = config('EVENTS_BUFFER_SIZE', default=100, cast=int)
+# Seconds a user's buffer is kept after their last event, older resumes get no backlog.
+EVENTS_RESUME_WINDOW = config('EVENTS_RESUME_WINDOW', default=3600, cast=int)
+# Events queued per connection before a slow client is disconnected (it resumes from the buffer).
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+EVENTS_KEEPALIVE = config('EVENTS_KEEPALIVE', default=15, cast=int)
+
+
+class LocalBroker:
+    '''Delivers events inside the current process, enough for a single worker.'''
+
+    deliver: Callable[[str], None]
+
+    async def start(self):
+        pass
+
+    async def publish(self, messages: List[str]):
+        for message in messages:
+            self.deliver(message)
+
+    async def stop(self):
+        pass
+
+
+class PostgresBroker:
+    '''Fans events out to every worker through PostgreSQL LISTEN/NOTIFY.
+    One dedicated asyncpg connection listens and publishes, outside the engine pool.'''
+
+    deliver: Callable[[str], None]
+
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self.connection = None
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        async with self.lock:
+            if self.connection is not None:
+                return
+            import asyncpg
+
+            self.connection = await asyncpg.connect(self.dsn)
+            await self.connection.add_listener(self.channel, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.deliver(payload)
+
+    async def publish(self, messages: List[str]):
+        await self.start()
+        async with self.lock:
+            await self.connection.executemany(
+                "SELECT pg_notify($1, $2)", [(self.channel, message) for message in messages]
+            )
+
+    async def stop(self):
+        async with self.lock:
+            if self.connection is not None:
+                await self.connection.close()
+                self.connection = None
+
+
+class EventHub:
+    '''Per-user pub/sub of task changes.
+    Every delivered event is appended to a bounded per-user buffer and pushed to
+    the queues of that user's open connections. Listeners receive every event, of
+    every user, as it is delivered. A buffer is dropped once its last event is older
+    than resume_window seconds, so idle users do not keep one forever.'''
+
+    def __init__(self, broker, buffer_size: int, queue_size: int, resume_window: float):
+        self.broker = broker
+        self.broker.deliver = self.deliver
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self.resume_window = resume_window
+        # Least recently delivered user first.
+        self.buffers: OrderedDict[int, deque] = OrderedDict()
+        self.subscribers: dict[int, set[asyncio.Queue]] = {}
+        self.listeners: List[Callable[[dict], None]] = []
+        self._last_id = 0
+
+    def _next_id(self) -> int:
+        # Nanosecond timestamps keep ids ordered across workers, the max() keeps them unique in one.
+        self._last_id = max(self._last_id + 1, time.time_ns())
+        return self._last_id
+
+    async def start(self):
+        await self.broker.start()
+
+    async def stop(self):
+        await self.broker.stop()
+
+    async def publish(self, user_id: int, event_type: str, items: List[dict]):
+        '''Publish one event per item, call it once the change is committed.'''
+        if not items:
+            return
+        await self.broker.publish([
+            json.dumps({"id": self._next_id(), "user_id": user_id, "type": event_type, "data": data})
+            for data in items
+        ])
+
+    def deliver(self, message: str):
+        event = json.loads(message)
+        user_id = event["user_id"]
+        buffer = self.buffers.get(user_id)
+        if buffer is None:
+            buffer = self.buffers[user_id] = deque(maxlen=self.buffer_size)
+        buffer.append(event)
+        self.buffers.move_to_end(user_id)
+        self._evict_idle_buffers()
+        for listener in self.listeners:
+            listener(event)
+        for queue in self.subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Replace the backlog with an end-of-stream marker, the client reconnects
+                # with its Last-Event-ID and catches up from the buffer.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def _evict_idle_buffers(self):
+        # Event ids are nanosecond timestamps, the last one tells when a buffer was written.
+        expired = time.time_ns() - int(self.resume_window * 1_000_000_000)
+        while self.buffers:
+            user_id, buffer = next(iter(self.buffers.items()))
+            if buffer[-1]["id"] >= expired:
+                break
+            del self.buffers[user_id]
+
+    def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> tuple[list, asyncio.Queue]:
+        '''Register a connection, returning the buffered events after last_event_id and its queue.'''
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        backlog = []
+        if last_event_id is not None:
+            backlog = [event for event in self.buffers.get(user_id, ()) if event["id"] > last_event_id]
+        return backlog, queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[user_id]
+
+
+def build_broker(name: str):
+    if name == 'memory':
+        return LocalBroker()
+    if name == 'postgres':
+        from db.database import DATABASE_URL
+
+        # asyncpg takes a plain libpq URL, without the SQLAlchemy driver suffix.
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBroker(dsn, EVENTS_CHANNEL)
+    raise ValueError(f"Unknown EVENTS_BACKEND {name!r}, expected memory or postgres")
+
+
+task_events = EventHub(
+    build_broker(EVENTS_BACKEND),
+    buffer_size=EVENTS_BUFFER_SIZE,
+    queue_size=EVENTS_QUEUE_SIZE,
+    resume_window=EVENTS_RESUME_WINDOW,
+)
+
+
+router = APIRouter()
+
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def event_stream(hub: EventHub, user_id: int, last_event_id: Optional[int]) -> AsyncIterator[str]:
+    '''Yield the buffered events after last_event_id, then live events as they are delivered.
+    A comment line is sent every EVENTS_KEEPALIVE seconds so proxies keep the connection open.'''
+
+    await hub.start()
+    backlog, queue = hub.subscribe(user_id, last_event_id)
+    try:
+        for event in backlog:
+            yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(user_id, queue)
+
+
+@router.get("/tasks/events/")
+async def stream_task_events(
+    last_event_id: Optional[int] = Header(None),
+    current_user: User = Depends(current_user)
+):
+    """Stream the current user's task changes as Server-Sent Events.
+    Events are task.created, task.updated (the task as returned by the task routes),
+    task.deleted ({"id": ...}) and task.due (the task, sent by the due-time scheduler).
+    Reconnecting clients send Last-Event-ID to receive the events they missed,
+    as long as they are still buffered."""
+
+    return StreamingResponse(
+        event_stream(task_events, current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
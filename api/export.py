@@ -0,0 +1,119 @@
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator, Type
+
+from fastapi import Depends, Query, APIRouter
+from fastapi.responses import StreamingResponse
+from fastapi_filter import FilterDepends
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from decouple import config
+
+from db.database import get_async_session
+from db.models import Task, TaskHistory, User
+from db.schemas import TaskResponse, TaskHistoryResponse
+from .auth import current_user
+from .Task import TaskFilter
+from .serialization import schema_columns
+
+
+EXPORT_PARTITION_SIZE = config('EXPORT_PARTITION_SIZE', default=1000, cast=int)
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+router = APIRouter()
+
+
+async def stream_export(
+    session: AsyncSession,
+    query: Select,
+    schema: Type[BaseModel],
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    '''Encode a query result partition by partition.
+    The rows are read through a server-side cursor, so only one partition is held in memory.'''
+
+    # FastAPI closes yield dependencies before a streamed body is sent,
+    # so the session reconnects here and has to be released by the stream itself.
+    try:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_PARTITION_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == ExportFormat.CSV:
+            writer.writerow(schema.model_fields)
+            yield buffer.getvalue()
+
+        async for partition in result.mappings().partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in partition:
+                record = schema.model_validate(row)
+                if export_format == ExportFormat.CSV:
+                    writer.writerow(record.model_dump(mode="json").values())
+                else:
+                    buffer.write(record.model_dump_json())
+                    buffer.write("\n")
+            yield buffer.getvalue()
+    finally:
+        await session.close()
+
+
+def export_response(
+    session: AsyncSession,
+    query: Select,
+    schema: Type[BaseModel],
+    export_format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    extension = "csv" if export_format == ExportFormat.CSV else "ndjson"
+    return StreamingResponse(
+        stream_export(session, query, schema, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
+
+
+@router.get("/tasks/export/", response_class=StreamingResponse)
+async def export_tasks(
+    task_filter: TaskFilter = FilterDepends(TaskFilter),
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+):
+    '''Export the current user's tasks as NDJSON or CSV.
+    Accept the same filters as the task list. The body is streamed, rows are ordered by id.'''
+
+    query = task_filter.filter(
+        select(*schema_columns(Task, TaskResponse)).where(Task.user_id == current_user.id)
+    ).order_by(Task.id)
+    return export_response(session, query, TaskResponse, export_format, "tasks")
+
+
+@router.get("/tasks/history/export/", response_class=StreamingResponse)
+async def export_task_history(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+):
+    '''Export the history of all tasks of the current user as NDJSON or CSV.
+    The body is streamed, rows are ordered by id.'''
+
+    query = (
+        select(*schema_columns(TaskHistory, TaskHistoryResponse))
+        .join(Task, Task.id == TaskHistory.task_id)
+        .where(Task.user_id == current_user.id)
+        .order_by(TaskHistory.id)
+    )
+    return export_response(session, query, TaskHistoryResponse, export_format, "task_history")
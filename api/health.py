@@ -0,0 +1,46 @@
+from fastapi import Depends, APIRouter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from db.database import engine, get_async_session
+from db.replicas import replicas
+from db.schemas import DatabaseHealth, CacheHealth, ReplicaHealth
+from .cache import task_list_cache
+
+
+router = APIRouter()
+
+
+@router.get("/db", response_model=DatabaseHealth)
+async def database_health(
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Check the database connection and report the engine pool counters.
+    Counters a pool class does not track are returned as null."""
+
+    await session.execute(text("SELECT 1"))
+
+    pool = engine.pool
+    counters = {}
+    for name, method in (
+        ("size", "size"),
+        ("checked_in", "checkedin"),
+        ("checked_out", "checkedout"),
+        ("overflow", "overflow"),
+    ):
+        if hasattr(pool, method):
+            counters[name] = getattr(pool, method)()
+    return DatabaseHealth(status="ok", pool=type(pool).__name__, **counters)
+
+
+@router.get("/replicas", response_model=List[ReplicaHealth])
+async def replica_health():
+    """Probe the read replicas now, an unhealthy replica gets no reads until it recovers."""
+    await replicas.check()
+    return [ReplicaHealth(name=replica.name, healthy=replica.healthy) for replica in replicas.replicas]
+
+
+@router.get("/cache", response_model=CacheHealth)
+async def cache_health():
+    """Report hit and miss counters of the task list cache in this worker."""
+    return task_list_cache.stats()
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from decouple import config
+
+from db.database import async_session_maker
+from db.models import Task, TaskHistory
+from db.utils.time_utils import get_datetime_now
+
+
+# strict: history rows are inserted in the transaction of the task write.
+# async: they are queued after the commit and written in batches by a background task.
+HISTORY_WRITE_MODE = config('HISTORY_WRITE_MODE', default='strict')
+HISTORY_QUEUE_SIZE = config('HISTORY_QUEUE_SIZE', default=10000, cast=int)
+HISTORY_BATCH_SIZE = config('HISTORY_BATCH_SIZE', default=500, cast=int)
+HISTORY_FLUSH_INTERVAL = config('HISTORY_FLUSH_INTERVAL', default=0.5, cast=float)
+HISTORY_WRITE_RETRIES = config('HISTORY_WRITE_RETRIES', default=3, cast=int)
+
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    '''Writes TaskHistory rows, either with the task change or behind it.
+    In async mode a full queue makes writers wait, so a slow database slows the
+    task routes down instead of growing memory without bound.'''
+
+    def __init__(self, mode: str, session_maker: async_sessionmaker, queue_size: int, batch_size: int, flush_interval: float):
+        if mode not in ('strict', 'async'):
+            raise ValueError(f"Unknown HISTORY_WRITE_MODE {mode!r}, expected strict or async")
+        self.mode = mode
+        self.session_maker = session_maker
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def commit(self, session: AsyncSession, entries: List[dict]):
+        '''Commit the session together with the history entries of its task changes.'''
+        if self.mode == 'strict':
+            if entries:
+                await session.execute(insert(TaskHistory), entries)
+            await session.commit()
+            return
+
+        await session.commit()
+        await self.start()
+        for entry in entries:
+            await self.queue.put(entry)
+
+    async def start(self):
+        if self.mode == 'async' and self._task is None:
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        '''Write every queued entry, then stop the background task.'''
+        if self._task is None:
+            return
+        await self.queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self.queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    await self._write(batch)
+                    return
+                batch.append(entry)
+            await self._write(batch)
+
+    async def _insert_existing(self, session: AsyncSession, batch: List[dict]):
+        '''Insert the entries whose task still exists, a task deleted after its change
+        was queued must not fail, or orphan, the history of the rest of the batch.'''
+        # FOR KEY SHARE on PostgreSQL keeps the tasks from being deleted until the commit.
+        existing = set((await session.execute(
+            select(Task.id)
+            .where(Task.id.in_({entry["task_id"] for entry in batch}))
+            .with_for_update(read=True, key_share=True)
+        )).scalars())
+        # Stamped at insert, so every batch is newer than the ones committed before it
+        # and clients polling with since=<last created_at> do not skip rows.
+        created_at = get_datetime_now()
+        entries = [{**entry, "created_at": created_at} for entry in batch if entry["task_id"] in existing]
+        if len(entries) < len(batch):
+            logger.info("Skipped %d task history entries of deleted tasks", len(batch) - len(entries))
+        if entries:
+            await session.execute(insert(TaskHistory), entries)
+
+    async def _write(self, batch: List[dict]):
+        for attempt in range(1, HISTORY_WRITE_RETRIES + 1):
+            try:
+                async with self.session_maker() as session:
+                    await self._insert_existing(session, batch)
+                    await session.commit()
+                return
+            except Exception:
+                if attempt == HISTORY_WRITE_RETRIES:
+                    logger.exception("Dropped %d task history entries", len(batch))
+                    return
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+
+history_writer = HistoryWriter(
+    HISTORY_WRITE_MODE,
+    async_session_maker,
+    queue_size=HISTORY_QUEUE_SIZE,
+    batch_size=HISTORY_BATCH_SIZE,
+    flush_interval=HISTORY_FLUSH_INTERVAL,
+)
@@ -0,0 +1,198 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from decouple import config
+
+
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=200, cast=float)
+# A request running more statements than this is logged as a possible N+1 pattern.
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=20, cast=int)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    '''SQL statements and database time of the request being served.'''
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.statements = 0
+        self.db_time = 0.0
+        self.n_plus_one = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+
+class MetricsRegistry:
+    '''Per-process counters, keyed by method, route template and status code.'''
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str, int], RouteMetrics] = {}
+        self.slow_queries = 0
+        self.gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        '''Expose a value read when /metrics is scraped.'''
+        self.gauges[name] = (help_text, read)
+
+    def observe(self, method: str, route: str, status_code: int, duration: float, stats: RequestStats, n_plus_one: bool):
+        metrics = self.routes.get((method, route, status_code))
+        if metrics is None:
+            metrics = self.routes[(method, route, status_code)] = RouteMetrics()
+        metrics.requests += 1
+        metrics.duration += duration
+        metrics.statements += stats.statements
+        metrics.db_time += stats.db_time
+        metrics.n_plus_one += n_plus_one
+        index = bisect_left(DURATION_BUCKETS, duration)
+        if index < len(DURATION_BUCKETS):
+            metrics.buckets[index] += 1
+
+    def render(self) -> str:
+        '''Render the counters in the Prometheus text exposition format.'''
+        lines = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(method: str, route: str, status_code: int, **extra) -> str:
+            pairs = {"method": method, "route": route, "status": status_code, **extra}
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs.items()) + "}"
+
+        family("http_request_duration_seconds", "histogram", "Request wall time.")
+        for key, metrics in sorted(self.routes.items()):
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, metrics.buckets):
+                cumulative += count
+                lines.append(f"http_request_duration_seconds_bucket{labels(*key, le=bound)} {cumulative}")
+            lines.append(f"http_request_duration_seconds_bucket{labels(*key, le='+Inf')} {metrics.requests}")
+            lines.append(f"http_request_duration_seconds_sum{labels(*key)} {metrics.duration}")
+            lines.append(f"http_request_duration_seconds_count{labels(*key)} {metrics.requests}")
+
+        for name, kind, help_text, attribute in (
+            ("db_statements_total", "counter", "SQL statements executed while serving requests.", "statements"),
+            ("db_duration_seconds_total", "counter", "Time spent in SQL statements while serving requests.", "db_time"),
+            ("db_n_plus_one_requests_total", "counter", f"Requests that ran more than {N_PLUS_ONE_THRESHOLD} SQL statements.", "n_plus_one"),
+        ):
+            family(name, kind, help_text)
+            for key, metrics in sorted(self.routes.items()):
+                lines.append(f"{name}{labels(*key)} {getattr(metrics, attribute)}")
+
+        family("db_slow_queries_total", "counter", f"SQL statements slower than {SLOW_QUERY_MS} ms.")
+        lines.append(f"db_slow_queries_total {self.slow_queries}")
+
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            family(name, "gauge", help_text)
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+    if elapsed * 1000 > SLOW_QUERY_MS:
+        registry.slow_queries += 1
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for a failed statement.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def instrument_engine(engine: AsyncEngine):
+    '''Time every statement run through the engine, once per engine.'''
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class InstrumentationMiddleware:
+    '''Measure every HTTP request, add a Server-Timing header and feed the registry.
+    The header is written when the response starts, so a streamed body is not included.'''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={total:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} queries"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            duration = time.perf_counter() - started
+            # The route template keeps the label set bounded, unmatched paths share one label.
+            route = scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            n_plus_one = stats.statements > N_PLUS_ONE_THRESHOLD
+            if n_plus_one:
+                logger.warning(
+                    "%s %s ran %d SQL statements, possible N+1 query pattern",
+                    scope["method"], route_path, stats.statements
+                )
+            registry.observe(scope["method"], route_path, status_code, duration, stats, n_plus_one)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint, counters are per worker process."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,132 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional, Tuple, Union
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, select, tuple_
+from decouple import config
+
+from db.models import Task, TaskHistory
+
+
+DEFAULT_PAGE_SIZE = config('DEFAULT_PAGE_SIZE', default=50, cast=int)
+MAX_PAGE_SIZE = config('MAX_PAGE_SIZE', default=200, cast=int)
+
+
+class PageParams:
+    '''Query parameters shared by every keyset-paginated list endpoint.'''
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(*values) -> str:
+    '''Pack the sort key of the last row of a page into an opaque token.'''
+    raw = json.dumps(values, default=lambda value: value.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def _decode_task_cursor(cursor: str) -> Tuple[datetime, int]:
+    values = decode_cursor(cursor)
+    try:
+        due_time, task_id = values
+        return datetime.fromisoformat(due_time), int(task_id)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate_tasks(query: Select, page: PageParams) -> Select:
+    '''Order a task query by (due_time, id) and seek past the cursor.
+    One extra row is fetched so the caller can tell whether a next page exists.'''
+
+    if page.cursor:
+        due_time, task_id = _decode_task_cursor(page.cursor)
+        query = query.where(tuple_(Task.due_time, Task.id) > tuple_(due_time, task_id))
+    return query.order_by(Task.due_time, Task.id).limit(page.limit + 1)
+
+
+def task_page(tasks: list, page: PageParams) -> dict:
+    '''Trim the look-ahead row and build the response body.'''
+
+    next_cursor = None
+    if len(tasks) > page.limit:
+        tasks = tasks[:page.limit]
+        last = tasks[-1]
+        next_cursor = encode_cursor(last.due_time, last.id)
+    return {"items": tasks, "next_cursor": next_cursor}
+
+
+def parse_since(since: Optional[str]) -> Union[int, datetime, None]:
+    '''Read a since parameter as a history id or as an ISO timestamp (naive values are UTC).'''
+    if since is None:
+        return None
+    if since.isdigit():
+        return int(since)
+    try:
+        moment = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be a history id or an ISO timestamp")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def paginate_history(query: Select, page: PageParams) -> Select:
+    '''Order a history query by id and seek past the cursor, fetching one look-ahead row.'''
+
+    if page.cursor:
+        values = decode_cursor(page.cursor)
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.where(TaskHistory.id > values[0])
+    return query.order_by(TaskHistory.id).limit(page.limit + 1)
+
+
+def history_page(entries: list, page: PageParams) -> dict:
+    '''Trim the look-ahead row, the cursor is the id of the last entry returned.'''
+
+    next_cursor = None
+    if len(entries) > page.limit:
+        entries = entries[:page.limit]
+        next_cursor = encode_cursor(entries[-1].id)
+    return {"items": entries, "next_cursor": next_cursor}
+
+
+def paginate_search(query: Select, page: PageParams) -> Select:
+    '''Order ranked search results by (rank, id) and seek past the cursor.'''
+
+    ranked = query.subquery()
+    paged = select(ranked)
+    if page.cursor:
+        values = decode_cursor(page.cursor)
+        if len(values) != 2 or not all(isinstance(value, (int, float)) for value in values):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        paged = paged.where(tuple_(ranked.c.rank, ranked.c.id) > tuple_(*values))
+    return paged.order_by(ranked.c.rank, ranked.c.id).limit(page.limit + 1)
+
+
+def search_page(rows: list, page: PageParams) -> dict:
+    '''Trim the look-ahead row, the cursor is the rank and id of the last match returned.'''
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Union
+
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+from decouple import config
+
+from .metrics import registry
+
+
+# argon2 or bcrypt, hashes of the other algorithm still verify and are replaced on login.
+PASSWORD_HASH_ALGORITHM = config('PASSWORD_HASH_ALGORITHM', default='argon2')
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=3, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=65536, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=4, cast=int)
+PASSWORD_BCRYPT_ROUNDS = config('PASSWORD_BCRYPT_ROUNDS', default=12, cast=int)
+# Threads hashing passwords per worker, further requests wait for a free thread.
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=2, cast=int)
+
+
+def build_password_hash(algorithm: str) -> PasswordHash:
+    '''The configured hasher first, the other one only verifies old hashes.'''
+    argon2 = Argon2Hasher(
+        time_cost=PASSWORD_ARGON2_TIME_COST,
+        memory_cost=PASSWORD_ARGON2_MEMORY_COST,
+        parallelism=PASSWORD_ARGON2_PARALLELISM,
+    )
+    bcrypt = BcryptHasher(rounds=PASSWORD_BCRYPT_ROUNDS)
+    if algorithm == 'argon2':
+        return PasswordHash((argon2, bcrypt))
+    if algorithm == 'bcrypt':
+        return PasswordHash((bcrypt, argon2))
+    raise ValueError(f"Unknown PASSWORD_HASH_ALGORITHM {algorithm!r}, expected argon2 or bcrypt")
+
+
+class PooledPasswordHelper(PasswordHelper):
+    '''Runs hashing and verification in a bounded thread pool so the event loop keeps
+    serving other requests. argon2-cffi and bcrypt release the GIL while hashing.
+    The synchronous methods of PasswordHelper stay available for fastapi-users.'''
+
+    def __init__(self, password_hash: PasswordHash, workers: int):
+        super().__init__(password_hash)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+
+    @property
+    def queued(self) -> int:
+        '''Operations waiting for a free thread.'''
+        return self.pending - self.running
+
+    def _call(self, function: Callable, *args):
+        with self.lock:
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def _done(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    async def _submit(self, function: Callable, *args):
+        with self.lock:
+            self.pending += 1
+        future = self.executor.submit(self._call, function, *args)
+        # Also runs when a cancelled request cancels the operation before it started.
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._submit(self.hash, password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> tuple[bool, Union[str, None]]:
+        '''Verify a password, returning a new hash when the stored one uses other parameters.'''
+        return await self._submit(self.verify_and_update, plain_password, hashed_password)
+
+
+password_helper = PooledPasswordHelper(build_password_hash(PASSWORD_HASH_ALGORITHM), workers=PASSWORD_HASH_WORKERS)
+
+registry.gauge("password_hash_queue_depth", "Password hash operations waiting for a thread.", lambda: password_helper.queued)
+registry.gauge("password_hash_in_flight", "Password hash operations running.", lambda: password_helper.running)
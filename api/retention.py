@@ -0,0 +1,240 @@
+"""Retention for task_history.
+
+Rows older than HISTORY_RETENTION_DAYS, or beyond the last HISTORY_RETENTION_KEEP_LAST
+entries of their task, are moved out of the hot table in bounded batches, either into
+task_history_archive or into gzip NDJSON files. With both settings a row is only moved
+when it is old and not one of the last entries of its task. The last entries are
+found per task from the (task_id, id) index, walking the tasks in batches.
+
+Every worker runs the job when HISTORY_RETENTION_INTERVAL is set, so set it for one
+process only, or run a single pass from cron:
+
+    uv run python -m api.retention
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from itertools import takewhile
+from typing import List, Optional
+
+from sqlalchemy import Select, Subquery, and_, delete, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+from decouple import config
+
+from db.database import async_session_maker
+from db.models import TaskHistory, TaskHistoryArchive
+from db.schemas import TaskHistoryResponse
+
+
+# 0 disables a policy.
+HISTORY_RETENTION_DAYS = config('HISTORY_RETENTION_DAYS', default=0, cast=int)
+HISTORY_RETENTION_KEEP_LAST = config('HISTORY_RETENTION_KEEP_LAST', default=0, cast=int)
+# archive: move rows to task_history_archive, file: append them to gzip NDJSON files.
+HISTORY_RETENTION_TARGET = config('HISTORY_RETENTION_TARGET', default='archive')
+HISTORY_ARCHIVE_DIR = config('HISTORY_ARCHIVE_DIR', default='archive')
+HISTORY_RETENTION_BATCH_SIZE = config('HISTORY_RETENTION_BATCH_SIZE', default=1000, cast=int)
+# Seconds between passes of the background job, 0 keeps it off.
+HISTORY_RETENTION_INTERVAL = config('HISTORY_RETENTION_INTERVAL', default=0, cast=int)
+# PostgreSQL with a partitioned task_history only: monthly partitions created ahead of time.
+HISTORY_PARTITION_MONTHS_AHEAD = config('HISTORY_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COLUMNS = ["id", "task_id", "status", "created_at", "due_time"]
+
+
+def history_cutoffs_query(keep_last: int, after_task_id: int, limit: int) -> Select:
+    '''Select the next tasks with history after after_task_id, each with the id of its
+    keep_last-th newest row, or NULL when it has fewer. Both walk the (task_id, id) index.'''
+
+    tasks = (
+        select(TaskHistory.task_id)
+        .where(TaskHistory.task_id > after_task_id)
+        .group_by(TaskHistory.task_id)
+        .order_by(TaskHistory.task_id)
+        .limit(limit)
+        .subquery()
+    )
+    newest = aliased(TaskHistory)
+    cutoff = (
+        select(newest.id)
+        .where(newest.task_id == tasks.c.task_id)
+        .order_by(newest.id.desc())
+        .offset(keep_last - 1)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return select(tasks.c.task_id, cutoff.label("cutoff_id")).order_by(tasks.c.task_id)
+
+
+def expired_history_query(days: int, now: datetime, limit: int, cutoffs: Subquery) -> Select:
+    '''Select the ids of the history rows of the tasks in cutoffs (see history_cutoffs_query)
+    that are below their cutoff id, and older than days when it is set.'''
+
+    query = select(TaskHistory.id).join(
+        cutoffs, and_(TaskHistory.task_id == cutoffs.c.task_id, TaskHistory.id < cutoffs.c.cutoff_id)
+    )
+    if days:
+        query = query.where(TaskHistory.created_at < now - timedelta(days=days))
+    return query.order_by(TaskHistory.id).limit(limit)
+
+
+def oldest_history_query(limit: int) -> Select:
+    '''Select the oldest history rows by primary key, ids grow with created_at.'''
+    return select(TaskHistory.id, TaskHistory.created_at).order_by(TaskHistory.id).limit(limit)
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    month = moment.month - 1 + months
+    return datetime(moment.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_history_partitions(session: AsyncSession, now: datetime, months_ahead: int):
+    '''Create the coming monthly partitions when task_history is partitioned, see the
+    partition_task_history migration. Does nothing on other tables and databases.'''
+    partitioned = await session.scalar(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'task_history'"
+    ))
+    if not partitioned:
+        return
+    for offset in range(months_ahead + 1):
+        start, end = month_start(now, offset), month_start(now, offset + 1)
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS task_history_{start:%Y_%m} PARTITION OF task_history "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+    await session.commit()
+
+
+class HistoryRetention:
+    '''Moves expired history rows out of task_history, one transaction per batch.'''
+
+    def __init__(self, session_maker: async_sessionmaker, days: int, keep_last: int, target: str, archive_dir: str, batch_size: int):
+        if target not in ('archive', 'file'):
+            raise ValueError(f"Unknown HISTORY_RETENTION_TARGET {target!r}, expected archive or file")
+        self.session_maker = session_maker
+        self.days = days
+        self.keep_last = keep_last
+        self.target = target
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.days or self.keep_last)
+
+    async def run_once(self) -> int:
+        '''Move every expired row, return how many were moved.'''
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        moved = 0
+        async with self.session_maker() as session:
+            if session.get_bind().dialect.name == 'postgresql':
+                await ensure_history_partitions(session, now, HISTORY_PARTITION_MONTHS_AHEAD)
+            if not self.enabled:
+                return 0
+            if not self.keep_last:
+                return await self._move_old(session, now)
+            # Tasks are walked in batches, so every query stays bounded by the batch size.
+            after_task_id = 0
+            while True:
+                window = history_cutoffs_query(self.keep_last, after_task_id, self.batch_size)
+                rows = (await session.execute(window)).all()
+                if any(row.cutoff_id is not None for row in rows):
+                    moved += await self._move_expired(session, now, window.subquery())
+                if len(rows) < self.batch_size:
+                    return moved
+                after_task_id = rows[-1].task_id
+
+    async def _move_old(self, session: AsyncSession, now: datetime) -> int:
+        '''Walk the primary key from the oldest row and stop at the first recent one,
+        so a pass never scans the rows it keeps.'''
+        expired = now - timedelta(days=self.days)
+        moved = 0
+        while True:
+            rows = (await session.execute(oldest_history_query(self.batch_size))).all()
+            ids = [row.id for row in takewhile(lambda row: row.created_at < expired, rows)]
+            if ids:
+                await self._move(session, ids, now)
+                moved += len(ids)
+            if len(ids) < self.batch_size:
+                return moved
+            # Let requests waiting on the database in between batches.
+            await asyncio.sleep(0)
+
+    async def _move_expired(self, session: AsyncSession, now: datetime, cutoffs: Subquery) -> int:
+        moved = 0
+        while True:
+            ids = (await session.execute(
+                expired_history_query(self.days, now, self.batch_size, cutoffs)
+            )).scalars().all()
+            if ids:
+                await self._move(session, ids, now)
+                moved += len(ids)
+            if len(ids) < self.batch_size:
+                return moved
+            await asyncio.sleep(0)
+
+    async def _move(self, session: AsyncSession, ids: List[int], now: datetime):
+        columns = [getattr(TaskHistory, name) for name in HISTORY_COLUMNS]
+        rows = select(*columns).where(TaskHistory.id.in_(ids))
+        if self.target == 'archive':
+            await session.execute(insert(TaskHistoryArchive).from_select(HISTORY_COLUMNS, rows))
+        else:
+            result = await session.execute(rows.order_by(TaskHistory.id))
+            lines = [TaskHistoryResponse.model_validate(row._asdict()).model_dump_json() for row in result]
+            await asyncio.to_thread(self._append, now, lines)
+        await session.execute(delete(TaskHistory).where(TaskHistory.id.in_(ids)))
+        await session.commit()
+
+    def _append(self, now: datetime, lines: List[str]):
+        # Every append adds a gzip member, gzip readers return them as one stream.
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"task_history-{now:%Y-%m-%d}.ndjson.gz")
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            archive.write("".join(line + "\n" for line in lines))
+            archive.flush()
+            os.fsync(archive.fileno())
+
+    async def start(self, interval: int):
+        if interval and self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval: int):
+        while True:
+            try:
+                moved = await self.run_once()
+                if moved:
+                    logger.info("Moved %d task history rows to %s", moved, self.target)
+            except Exception:
+                logger.exception("Task history retention pass failed")
+            await asyncio.sleep(interval)
+
+
+history_retention = HistoryRetention(
+    async_session_maker,
+    days=HISTORY_RETENTION_DAYS,
+    keep_last=HISTORY_RETENTION_KEEP_LAST,
+    target=HISTORY_RETENTION_TARGET,
+    archive_dir=HISTORY_ARCHIVE_DIR,
+    batch_size=HISTORY_RETENTION_BATCH_SIZE,
+)
+
+
+if __name__ == "__main__":
+    print(json.dumps({"moved": asyncio.run(history_retention.run_once())}))
@@ -1,3 +1,7 @@
 from .auth import router as auth_router
 from .Task import router as task_router
-from .TaskHistory import router as task_history_router
\ No newline at end of file
+from .TaskHistory import router as task_history_router
+from .export import router as export_router
+from .health import router as health_router
+from .events import router as events_router
+from .metrics import router as metrics_router
@@ -0,0 +1,241 @@
+"""Due-time scheduler.
+
+Keeps the upcoming due times of unfinished tasks in a min-heap and, when a task
+becomes due, publishes a task.due event to its owner and optionally moves it to
+SCHEDULER_DUE_STATUS. Due times are loaded in batches from the (status, due_time)
+index, SCHEDULER_LOOKAHEAD seconds ahead, and tasks written in between arrive
+through the task event hub, so every change costs a heap push instead of a scan.
+Tasks that became due while the scheduler was not running are fired on start, in
+batches from the same index.
+
+Enable it for a single process. With more than one worker use EVENTS_BACKEND=postgres
+so the scheduler also sees the task changes made by the other workers.
+"""
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, select, tuple_, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from decouple import config
+
+from db.database import async_session_maker
+from db.models import Task
+from db.schemas import TaskResponse
+from db.types import TaskStatus
+from .cache import task_list_cache
+from .events import EventHub, task_events
+from .history_writer import history_writer
+from .serialization import schema_columns
+
+
+SCHEDULER_ENABLED = config('SCHEDULER_ENABLED', default=False, cast=bool)
+# Seconds of upcoming due times kept in memory.
+SCHEDULER_LOOKAHEAD = config('SCHEDULER_LOOKAHEAD', default=3600, cast=int)
+SCHEDULER_BATCH_SIZE = config('SCHEDULER_BATCH_SIZE', default=500, cast=int)
+# Status set on tasks when they become due, empty only publishes task.due events.
+SCHEDULER_DUE_STATUS = config('SCHEDULER_DUE_STATUS', default='')
+# Seconds to wait after a failed pass.
+SCHEDULER_RETRY_DELAY = config('SCHEDULER_RETRY_DELAY', default=5, cast=float)
+
+# Largest id, used to mark the horizon itself as loaded.
+MAX_ID = 2 ** 31 - 1
+# Sort key before every task, where the overdue backlog starts.
+FIRST_KEY = (datetime.min, 0)
+
+
+logger = logging.getLogger(__name__)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class DueScheduler:
+    '''Min-heap of (due_time, task_id) for the unfinished tasks due before the horizon.
+    A task whose due time or status changes gets a new entry and its old entry is
+    skipped when popped, scheduled maps every task to its current due time.'''
+
+    def __init__(self, session_maker: async_sessionmaker, hub: EventHub, lookahead: int, batch_size: int, due_status: Optional[TaskStatus]):
+        self.session_maker = session_maker
+        self.hub = hub
+        self.lookahead = timedelta(seconds=lookahead)
+        self.batch_size = batch_size
+        self.due_status = due_status
+        self.statuses = [task_status for task_status in (TaskStatus.NEW, TaskStatus.IN_PROGRESS) if task_status != due_status]
+        self.heap: List[Tuple[datetime, int]] = []
+        self.scheduled: dict[int, datetime] = {}
+        # (due_time, id) of the last loaded task, everything due up to it is in the heap.
+        self.cursor: Optional[Tuple[datetime, int]] = None
+        # (due_time, id) of the last fired overdue task, None once the backlog is done.
+        self.backlog: Optional[Tuple[datetime, int]] = None
+        self.wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def due_query(self, after: Tuple[datetime, int], until: datetime, limit: int) -> Select:
+        return (
+            select(Task.id, Task.due_time)
+            .where(
+                Task.status.in_(self.statuses),
+                Task.due_time >= after[0],
+                tuple_(Task.due_time, Task.id) > tuple_(*after),
+                Task.due_time <= until,
+            )
+            .order_by(Task.due_time, Task.id)
+            .limit(limit)
+        )
+
+    def push(self, task_id: int, due_time: datetime):
+        self.scheduled[task_id] = due_time
+        heapq.heappush(self.heap, (due_time, task_id))
+        if self.heap[0] == (due_time, task_id):
+            self.wake.set()
+
+    async def load(self, now: datetime):
+        '''Load the due times between the cursor and the horizon, one batch at a time.'''
+        horizon = now + self.lookahead
+        async with self.session_maker() as session:
+            while True:
+                rows = (await session.execute(self.due_query(self.cursor, horizon, self.batch_size))).all()
+                for row in rows:
+                    self.push(row.id, row.due_time)
+                if len(rows) < self.batch_size:
+                    self.cursor = (horizon, MAX_ID)
+                    return
+                self.cursor = (rows[-1].due_time, rows[-1].id)
+
+    def on_event(self, event: dict):
+        '''Follow task writes, only tasks due before the cursor are kept in the heap.'''
+        if event["type"] not in ("task.created", "task.updated", "task.deleted"):
+            return
+        data = event["data"]
+        self.scheduled.pop(data["id"], None)
+        if event["type"] == "task.deleted" or self.cursor is None or TaskStatus(data["status"]) not in self.statuses:
+            return
+        due_time = datetime.fromisoformat(data["due_time"])
+        if due_time.tzinfo is not None:
+            due_time = due_time.astimezone(timezone.utc).replace(tzinfo=None)
+        if utc_now() < due_time and (due_time, data["id"]) <= self.cursor:
+            self.push(data["id"], due_time)
+
+    async def catch_up(self, until: datetime):
+        '''Fire the unfinished tasks due before until, the start of the scheduler, one batch
+        at a time. After a failure the next call continues with the batch that failed.'''
+        while self.backlog is not None:
+            async with self.session_maker() as session:
+                rows = (await session.execute(self.due_query(self.backlog, until, self.batch_size))).all()
+            if rows:
+                # Moved first: the tasks of a batch that fails are requeued by fire.
+                self.backlog = (rows[-1].due_time, rows[-1].id)
+                await self.fire([row.id for row in rows], utc_now())
+            if len(rows) < self.batch_size:
+                self.backlog = None
+
+    def pop_due(self, now: datetime) -> List[int]:
+        task_ids = []
+        while self.heap and self.heap[0][0] <= now:
+            due_time, task_id = heapq.heappop(self.heap)
+            if self.scheduled.get(task_id) == due_time:
+                del self.scheduled[task_id]
+                task_ids.append(task_id)
+        return task_ids
+
+    async def fire(self, task_ids: List[int], now: datetime):
+        '''Publish task.due for the tasks that are still unfinished and due, moving them
+        to due_status first when it is set, batch_size tasks per transaction.
+        When a batch fails, it and the following ones are pushed back on the heap.'''
+        for start in range(0, len(task_ids), self.batch_size):
+            try:
+                await self._fire_batch(task_ids[start:start + self.batch_size], now)
+            except Exception:
+                for task_id in task_ids[start:]:
+                    # A task written since then was rescheduled by on_event.
+                    if task_id not in self.scheduled:
+                        self.push(task_id, now)
+                raise
+
+    async def _fire_batch(self, batch: List[int], now: datetime):
+        columns = schema_columns(Task, TaskResponse)
+        condition = (Task.id.in_(batch), Task.status.in_(self.statuses), Task.due_time <= now)
+        async with self.session_maker() as session:
+            if self.due_status is None:
+                rows = (await session.execute(select(*columns).where(*condition))).all()
+            else:
+                rows = (await session.execute(
+                    update(Task)
+                    .where(*condition)
+                    .values(status=self.due_status, version=Task.version + 1)
+                    .returning(*columns)
+                )).all()
+                await history_writer.commit(session, [
+                    {"task_id": row.id, "status": row.status, "due_time": row.due_time} for row in rows
+                ])
+
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row.user_id].append(TaskResponse.model_validate(row._asdict()).model_dump(mode="json"))
+        for user_id, items in by_user.items():
+            if self.due_status is not None:
+                await task_list_cache.invalidate(user_id)
+                await self.hub.publish(user_id, "task.updated", items)
+            await self.hub.publish(user_id, "task.due", items)
+
+    async def start(self):
+        if self._task is None:
+            self.cursor = (utc_now(), MAX_ID)
+            self.backlog = FIRST_KEY
+            self.hub.listeners.append(self.on_event)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.hub.listeners.remove(self.on_event)
+            self.heap.clear()
+            self.scheduled.clear()
+            self.cursor = None
+            self.backlog = None
+
+    async def _run(self):
+        while True:
+            self.wake.clear()
+            now = utc_now()
+            try:
+                if self.backlog is not None:
+                    # The cursor still is the start time until the backlog is done.
+                    await self.catch_up(self.cursor[0])
+                # Refill once half of the loaded window has passed.
+                if self.cursor[0] - now < self.lookahead / 2:
+                    await self.load(now)
+                task_ids = self.pop_due(now)
+                if task_ids:
+                    await self.fire(task_ids, now)
+            except Exception:
+                logger.exception("Due-time scheduler pass failed")
+                await asyncio.sleep(SCHEDULER_RETRY_DELAY)
+
+            wake_at = self.cursor[0] - self.lookahead / 2
+            if self.heap:
+                wake_at = min(wake_at, self.heap[0][0])
+            timeout = max((wake_at - utc_now()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+due_scheduler = DueScheduler(
+    async_session_maker,
+    task_events,
+    lookahead=SCHEDULER_LOOKAHEAD,
+    batch_size=SCHEDULER_BATCH_SIZE,
+    due_status=TaskStatus(SCHEDULER_DUE_STATUS) if SCHEDULER_DUE_STATUS else None,
+)
@@ -0,0 +1,37 @@
+from sqlalchemy import Integer, Select, column, func, literal_column, select, table
+from fastapi import HTTPException, status
+
+from db.models import Task
+
+
+# External content FTS5 table kept in sync with tasks by triggers, see TASK_SEARCH_DDL.
+tasks_fts = table("tasks_fts", column("rowid", Integer))
+
+
+def fts5_query(q: str) -> str:
+    '''Quote every word of the user's input so FTS5 syntax in it is matched literally.
+    The quoted words are ANDed, like websearch_to_tsquery does on PostgreSQL.'''
+    terms = q.split()
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="q must contain a search term")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_tasks_query(dialect: str, user_id: int, q: str, columns: list) -> Select:
+    '''Select a user's tasks matching q together with a rank column, the best match has the lowest rank.
+    Matches come from the full-text index, so the cost follows the number of matches, not the table size.'''
+
+    if dialect == "sqlite":
+        rank = func.bm25(literal_column("tasks_fts")).label("rank")
+        return (
+            select(*columns, rank)
+            .select_from(Task)
+            .join(tasks_fts, tasks_fts.c.rowid == Task.id)
+            .where(literal_column("tasks_fts").op("MATCH")(fts5_query(q)), Task.user_id == user_id)
+        )
+    if dialect == "postgresql":
+        vector = literal_column("tasks.search_vector")
+        tsquery = func.websearch_to_tsquery("english", q)
+        rank = (-func.ts_rank(vector, tsquery)).label("rank")
+        return select(*columns, rank).where(vector.op("@@")(tsquery), Task.user_id == user_id)
+    raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=f"Search is not available on {dialect}")
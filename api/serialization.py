@@ -0,0 +1,62 @@
+import json
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, TypeAdapter, create_model
+from sqlalchemy import Row
+
+from db.schemas import TaskResponse, TaskHistoryResponse
+
+
+@lru_cache(maxsize=256)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+task_list_adapter = list_adapter(TaskResponse)
+task_history_list_adapter = list_adapter(TaskHistoryResponse)
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> list:
+    '''Select only the columns the response schema exposes, so rows never become ORM objects.'''
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Tuple[str, ...]:
+    '''Read a comma separated fields parameter, all fields when it is empty.
+    The names keep the schema order, so equal selections share one projection.'''
+    if not fields:
+        return tuple(schema.model_fields)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(schema.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def projection(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    '''Model with only the given fields of schema, created once per selection.'''
+    if fields == tuple(schema.model_fields):
+        return schema
+    return create_model(
+        f"{schema.__name__}Projection",
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    )
+
+
+def rows_json(adapter: TypeAdapter, rows: Sequence[Row]) -> bytes:
+    '''Validate Core rows as one list and serialize them by pydantic-core straight to bytes.'''
+    # Plain dicts take pydantic-core's fast path, generic mappings and from_attributes do not.
+    keys = rows[0]._fields if rows else ()
+    return adapter.dump_json(adapter.validate_python([dict(zip(keys, row)) for row in rows]))
+
+
+def page_json(adapter: TypeAdapter, rows: Sequence[Row], next_cursor: Optional[str]) -> bytes:
+    '''Encode a page of Core rows as {"items": [...], "next_cursor": ...}.
+    The output is identical to model_dump_json() of the page model.'''
+    return b'{"items":' + rows_json(adapter, rows) + b',"next_cursor":' + json.dumps(next_cursor).encode() + b'}'
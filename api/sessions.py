@@ -0,0 +1,27 @@
+from typing import AsyncGenerator
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_async_session
+from db.models import User
+from db.replicas import replicas
+from .auth import current_user
+
+
+async def get_read_session(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(current_user)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes, on a read replica when one is healthy and the
+    user has not written recently, otherwise the primary session of the request.
+    Routes that write call replicas.mark_write after committing.
+    Replica sessions have info["replica"] set."""
+
+    replica = replicas.pick(current_user.id)
+    if replica is None:
+        yield session
+        return
+    async with replica.session_maker() as replica_session:
+        replica_session.info["replica"] = True
+        yield replica_session
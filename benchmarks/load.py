@@ -0,0 +1,281 @@
+"""Load test for the auth, task and history routes.
+
+Seeds a throw-away SQLite database, drives every scenario either in-process
+through httpx's ASGITransport or against a real uvicorn process, and records
+p50/p95/p99 latency and requests per second to a JSON baseline.
+
+    uv run python -m benchmarks.load --rows 10000 --output benchmarks/baseline.json
+    uv run python -m benchmarks.load --transport uvicorn --workers 4 --compare benchmarks/baseline.json
+
+--database reuses a SQLite file, an existing one is only wiped and reseeded with --reset.
+
+With --compare the run exits with status 1 when a route regresses by more
+than --threshold (p95 latency up or throughput down).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+USER_EMAIL = "bench@example.com"
+USER_PASSWORD = "benchPassword"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    '''Nearest-rank percentile of a non-empty list.'''
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    '''Return one message per route whose p95 grew or whose throughput dropped beyond threshold.'''
+    regressions = []
+    for route, before in baseline["routes"].items():
+        after = current["routes"].get(route)
+        if after is None:
+            continue
+        if after["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{route}: p95 {before['p95_ms']}ms -> {after['p95_ms']}ms")
+        if after["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{route}: rps {before['rps']} -> {after['rps']}")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{route}: errors {before['errors']} -> {after['errors']}")
+    return regressions
+
+
+async def seed(rows: int, history_per_task: int) -> None:
+    '''Create the schema, one user and `rows` tasks with their history.'''
+    from sqlalchemy import insert
+    from fastapi_users.password import PasswordHelper
+    from db.database import engine
+    from db.models import Base, User, Task, TaskHistory
+    from db.types import TaskStatus
+
+    statuses = list(TaskStatus)
+    start = datetime(2030, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{
+            "email": USER_EMAIL,
+            "hashed_password": PasswordHelper().hash(USER_PASSWORD),
+            "is_active": True,
+            "is_superuser": False,
+            "is_verified": True,
+        }])
+        for offset in range(0, rows, 5000):
+            chunk = range(offset, min(rows, offset + 5000))
+            await conn.execute(insert(Task), [{
+                "id": number + 1,
+                "user_id": 1,
+                "title": f"Task {number}",
+                "description": "Seeded by the load test. " * 8,
+                "status": statuses[number % len(statuses)],
+                "due_time": start + timedelta(minutes=number),
+            } for number in chunk])
+            await conn.execute(insert(TaskHistory), [{
+                "task_id": number + 1,
+                "status": statuses[(number + step) % len(statuses)],
+                "due_time": start + timedelta(minutes=number),
+            } for number in chunk for step in range(history_per_task)])
+    await engine.dispose()
+
+
+Scenario = Callable[[httpx.AsyncClient, dict], Awaitable[httpx.Response]]
+
+
+def scenarios(rows: int) -> Dict[str, Scenario]:
+    def task_id() -> int:
+        return random.randint(1, rows)
+
+    return {
+        "auth_login": lambda client, ctx: client.post(
+            "/auth/login", data={"username": USER_EMAIL, "password": USER_PASSWORD}
+        ),
+        "tasks_list": lambda client, ctx: client.get(
+            "/api/tasks/", params={"limit": 50}, headers=ctx["headers"]
+        ),
+        "tasks_list_filtered": lambda client, ctx: client.get(
+            "/api/tasks/", params={"status": "new", "limit": 50}, headers=ctx["headers"]
+        ),
+        "all_tasks_list": lambda client, ctx: client.get(
+            "/api/all_tasks/", params={"limit": 50}, headers=ctx["headers"]
+        ),
+        "task_detail": lambda client, ctx: client.get(
+            f"/api/task/{task_id()}", headers=ctx["headers"]
+        ),
+        "task_history": lambda client, ctx: client.get(
+            f"/api/task/{task_id()}/history/", headers=ctx["headers"]
+        ),
+        "task_update": lambda client, ctx: client.put(
+            f"/api/task/{task_id()}/", json={"status": "in_progress"}, headers=ctx["headers"]
+        ),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: dict, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await scenario(client, ctx)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def drive(client: httpx.AsyncClient, args) -> dict:
+    login = await client.post("/auth/login", data={"username": USER_EMAIL, "password": USER_PASSWORD})
+    login.raise_for_status()
+    ctx = {"headers": {"Authorization": f"Bearer {login.json()['access_token']}"}}
+
+    results = {}
+    for name, scenario in scenarios(args.rows).items():
+        if args.routes and name not in args.routes:
+            continue
+        # Login is CPU bound by password hashing, keep it from dominating the run time.
+        requests = max(1, args.requests // 10) if name == "auth_login" else args.requests
+        await run_scenario(client, ctx, scenario, min(requests, args.warmup), args.concurrency)
+        results[name] = await run_scenario(client, ctx, scenario, requests, args.concurrency)
+        print(f"{name:22} {json.dumps(results[name])}")
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health/db")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not become ready at {base_url}")
+
+
+async def main(args) -> dict:
+    await seed(args.rows, args.history_per_task)
+
+    if args.transport == "asgi":
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            routes = await drive(client, args)
+    else:
+        port = free_port()
+        server = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ])
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_until_ready(base_url)
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+                routes = await drive(client, args)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {
+        "meta": {
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "uvicorn" else 1,
+            "rows": args.rows,
+            "history_per_task": args.history_per_task,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": sys.version.split()[0],
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "routes": routes,
+    }
+
+
+def benchmark_database(path: Optional[str], reset: bool) -> str:
+    '''Return the SQLite file to seed. Seeding drops every table, so an existing
+    non-empty file is only accepted with reset.'''
+    if path is None:
+        return os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite")
+    if os.path.exists(path) and os.path.getsize(path) and not reset:
+        raise SystemExit(f"{path} is not empty, seeding would drop its tables; pass --reset to allow it")
+    return path
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="tasks to seed")
+    parser.add_argument("--history-per-task", type=int, default=3, help="history entries seeded per task")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per route")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers, --transport uvicorn only")
+    parser.add_argument("--routes", nargs="*", help="only run these scenarios")
+    parser.add_argument("--database", help="SQLite file to seed, a temporary file by default")
+    parser.add_argument("--reset", action="store_true", help="drop the tables of an existing --database before seeding")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare the results against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression, 0.2 = 20%%")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # The app reads its settings on import, so point it at the benchmark database first.
+    os.environ["DB_ENGINE"] = "sqlite+aiosqlite"
+    os.environ["DB_NAME"] = benchmark_database(args.database, args.reset)
+    os.environ.setdefault("SECRET", "benchmark-secret")
+
+    results = asyncio.run(main(args))
+
+    if args.output:
+        with open(args.output, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,92 @@
+"""Micro-benchmark of the task list serialization paths.
+
+Compares, over an in-memory SQLite table, the ORM path (Task objects validated
+into the page model and encoded with model_dump_json) against the fast path
+(Core rows of the TaskResponse columns, one TypeAdapter validation and
+pydantic-core bytes), checks that both produce the same body and reports the
+cost per 10k rows.
+
+    uv run python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.serialization import page_json, schema_columns, task_list_adapter
+from db.models import Base, Task, User
+from db.schemas import TaskPage, TaskResponse
+from db.types import TaskStatus
+
+
+async def best_of(repeat: int, run: Callable[[], Awaitable[bytes]]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+async def measure(rows: int, repeat: int) -> dict:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    statuses = list(TaskStatus)
+    start = datetime(2030, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{
+            "email": "bench@example.com", "hashed_password": "-",
+            "is_active": True, "is_superuser": False, "is_verified": True,
+        }])
+        await conn.execute(insert(Task), [{
+            "user_id": 1,
+            "title": f"Task {number}",
+            "description": "Seeded by the serialization benchmark. " * 4,
+            "status": statuses[number % len(statuses)],
+            "due_time": start + timedelta(minutes=number),
+        } for number in range(rows)])
+
+    async with async_sessionmaker(engine)() as session:
+        async def orm_path() -> bytes:
+            # A fresh identity map, as every request gets its own session.
+            session.expunge_all()
+            tasks = (await session.execute(select(Task).order_by(Task.id))).scalars().all()
+            return TaskPage.model_validate(
+                {"items": tasks, "next_cursor": None}, from_attributes=True
+            ).model_dump_json().encode()
+
+        async def fast_path() -> bytes:
+            result = await session.execute(select(*schema_columns(Task, TaskResponse)).order_by(Task.id))
+            return page_json(task_list_adapter, result.all(), None)
+
+        identical = await orm_path() == await fast_path()
+        orm = await best_of(repeat, orm_path)
+        fast = await best_of(repeat, fast_path)
+    await engine.dispose()
+
+    scale = 10000 / rows * 1000
+    return {
+        "rows": rows,
+        "identical": identical,
+        "orm_ms_per_10k": round(orm * scale, 2),
+        "fast_ms_per_10k": round(fast * scale, 2),
+        "speedup": round(orm / fast, 2) if fast else None,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="tasks to seed and serialize")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path, the fastest counts")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(json.dumps(asyncio.run(measure(args.rows, args.repeat)), indent=2))
@@ -0,0 +1,79 @@
+"""Cold start profile of the application.
+
+Runs a fresh interpreter with -X importtime that imports main, builds the app with
+create_app and serves one request through ASGITransport, then reports the time of
+each phase and the packages that cost the most to import (self time summed per
+top-level package).
+
+    uv run python -m benchmarks.startup --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import List, Optional
+
+# Runs in the child interpreter, prints the phase timings as JSON on stdout.
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app()
+built = time.perf_counter()
+
+async def first_request():
+    import httpx
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://startup") as client:
+        return (await client.get("/metrics")).status_code
+
+status_code = asyncio.run(first_request())
+served = time.perf_counter()
+print(json.dumps({
+    "status_code": status_code,
+    "import_main_ms": round((imported - started) * 1000, 1),
+    "create_app_ms": round((built - imported) * 1000, 1),
+    "first_request_ms": round((served - built) * 1000, 1),
+    "time_to_first_request_ms": round((served - started) * 1000, 1),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    '''Sum the self time in microseconds of every imported module per top-level package.'''
+    packages: dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        packages[module.strip().split(".")[0]] += int(self_us)
+    return packages
+
+
+def measure(top: int) -> dict:
+    env = {**os.environ, "SECRET": os.environ.get("SECRET", "startup-benchmark")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    packages = parse_importtime(result.stderr)
+    report["import_total_ms"] = round(sum(packages.values()) / 1000, 1)
+    report["packages_ms"] = {
+        name: round(self_us / 1000, 1)
+        for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    }
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="packages listed by import time")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(json.dumps(measure(args.top), indent=2))
@@ -1,5 +1,7 @@
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi_users.db import SQLAlchemyUserDatabase
 from fastapi import Depends
@@ -22,8 +24,73 @@ else:
     DATABASE_URL = f"{DB_ENGINE}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 
+IS_SQLITE = DB_ENGINE.startswith('sqlite')
 
-engine = create_async_engine(DATABASE_URL)
+# Pool defaults: a small pool for SQLite, which serialises writers anyway,
+# and a larger pre-pinged, recycled pool for asyncpg.
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=5 if IS_SQLITE else 10, cast=int)
+DB_MAX_OVERFLOW = config('DB_MAX_OVERFLOW', default=10 if IS_SQLITE else 20, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=30, cast=int)
+DB_POOL_PRE_PING = config('DB_POOL_PRE_PING', default=not IS_SQLITE, cast=bool)
+DB_POOL_RECYCLE = config('DB_POOL_RECYCLE', default=-1 if IS_SQLITE else 1800, cast=int)
+# Connections each worker opens on startup.
+DB_POOL_WARMUP = config('DB_POOL_WARMUP', default=DB_POOL_SIZE, cast=int)
+
+# PostgreSQL only: statement_timeout in milliseconds (0 disables it) and the asyncpg prepared statement cache.
+DB_STATEMENT_TIMEOUT = config('DB_STATEMENT_TIMEOUT', default=30000, cast=int)
+DB_STATEMENT_CACHE_SIZE = config('DB_STATEMENT_CACHE_SIZE', default=100, cast=int)
+
+# SQLite only: pragmas applied to every new connection.
+SQLITE_JOURNAL_MODE = config('SQLITE_JOURNAL_MODE', default='WAL')
+SQLITE_SYNCHRONOUS = config('SQLITE_SYNCHRONOUS', default='NORMAL')
+SQLITE_BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=268435456, cast=int)
+
+
+def engine_options(is_sqlite: bool = IS_SQLITE) -> dict:
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if not is_sqlite:
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT)},
+        }
+    return options
+
+
+def database_url(url: str = DATABASE_URL) -> str:
+    if make_url(url).get_backend_name() == 'sqlite':
+        return url
+    # The asyncpg dialect reads its statement cache size from the URL query.
+    url = make_url(url).update_query_dict(
+        {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+    )
+    return url.render_as_string(hide_password=False)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+# Used for the primary and for the read replicas.
+def build_engine(url: str) -> AsyncEngine:
+    is_sqlite = make_url(url).get_backend_name() == 'sqlite'
+    new_engine = create_async_engine(database_url(url), **engine_options(is_sqlite))
+    if is_sqlite:
+        event.listen(new_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return new_engine
+
+
+engine = build_engine(DATABASE_URL)
 async_session_maker = async_sessionmaker(engine)
 
 
@@ -38,4 +105,4 @@ async def get_user_db(session: AsyncSession = Depends(get_async_session)):
 async def create_test_db_and_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
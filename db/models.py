@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, ForeignKey, Enum, DateTime
+from sqlalchemy import DDL, Integer, String, ForeignKey, Enum, DateTime, Index, event
 from sqlalchemy.orm import relationship, Mapped, mapped_column, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from fastapi_users.db import SQLAlchemyBaseUserTable
@@ -21,6 +21,13 @@ class User(SQLAlchemyBaseUserTable[int], Base):
 
 class Task(Base, AsyncAttrs):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_user_id_status_due_time", "user_id", "status", "due_time"),
+        Index("ix_tasks_status_due_time", "status", "due_time"),
+        # Unfiltered lists, in the (due_time, id) keyset order.
+        Index("ix_tasks_user_id_due_time_id", "user_id", "due_time", "id"),
+        Index("ix_tasks_due_time_id", "due_time", "id"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -28,16 +35,152 @@ class Task(Base, AsyncAttrs):
     status : Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), nullable=False, default=TaskStatus.NEW)
     due_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=get_datetime_now)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
     history: Mapped[list["TaskHistory"]] = relationship("TaskHistory", back_populates="task", cascade="all, delete-orphan")
     owner: Mapped["User"] = relationship("User", back_populates="tasks")
 
 
 class TaskHistory(Base, AsyncAttrs):
     __tablename__ = "task_history"
+    __table_args__ = (
+        Index("ix_task_history_task_id_created_at", "task_id", "created_at"),
+        Index("ix_task_history_task_id_id", "task_id", "id"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     task_id: Mapped[int] = mapped_column(Integer, ForeignKey("tasks.id"), nullable=False)
     status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=get_datetime_now)
     due_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
-    task: Mapped["Task"] = relationship("Task", back_populates="history")
\ No newline at end of file
+    task: Mapped["Task"] = relationship("Task", back_populates="history")
+
+
+class TaskHistoryArchive(Base):
+    """History rows moved out of task_history by the retention job, ids are kept."""
+    __tablename__ = "task_history_archive"
+    __table_args__ = (
+        Index("ix_task_history_archive_task_id_id", "task_id", "id"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    # No foreign key, archived history outlives its task.
+    task_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    due_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=get_datetime_now)
+
+
+class TaskStatusCount(Base):
+    """Number of tasks per user and status, kept current by the triggers below."""
+    __tablename__ = "task_status_counts"
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), primary_key=True)
+    task_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# Every write path, bulk statements included, goes through these triggers, so the
+# counters stay exact without the routes knowing about them. Rows reaching zero are
+# removed so deleting a user is not blocked by its counters.
+TASK_STATUS_COUNT_TRIGGERS = {
+    "sqlite": [
+        """
+        CREATE TRIGGER tasks_status_count_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO task_status_counts (user_id, status, task_count) VALUES (NEW.user_id, NEW.status, 1)
+            ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_delete AFTER DELETE ON tasks BEGIN
+            UPDATE task_status_counts SET task_count = task_count - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+            DELETE FROM task_status_counts WHERE user_id = OLD.user_id AND status = OLD.status AND task_count = 0;
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_update AFTER UPDATE OF user_id, status ON tasks
+        WHEN OLD.user_id IS NOT NEW.user_id OR OLD.status IS NOT NEW.status BEGIN
+            UPDATE task_status_counts SET task_count = task_count - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+            DELETE FROM task_status_counts WHERE user_id = OLD.user_id AND status = OLD.status AND task_count = 0;
+            INSERT INTO task_status_counts (user_id, status, task_count) VALUES (NEW.user_id, NEW.status, 1)
+            ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1;
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION tasks_status_count() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE task_status_counts SET task_count = task_count - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+                DELETE FROM task_status_counts WHERE user_id = OLD.user_id AND status = OLD.status AND task_count = 0;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO task_status_counts (user_id, status, task_count) VALUES (NEW.user_id, NEW.status, 1)
+                ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_status_counts.task_count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_insert_delete AFTER INSERT OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_status_count()
+        """,
+        """
+        CREATE TRIGGER tasks_status_count_update AFTER UPDATE OF user_id, status ON tasks
+        FOR EACH ROW WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id OR OLD.status IS DISTINCT FROM NEW.status)
+        EXECUTE FUNCTION tasks_status_count()
+        """,
+    ],
+}
+
+for dialect, statements in TASK_STATUS_COUNT_TRIGGERS.items():
+    for statement in statements:
+        event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect=dialect))
+event.listen(
+    Base.metadata, "after_drop",
+    DDL("DROP FUNCTION IF EXISTS tasks_status_count()").execute_if(dialect="postgresql")
+)
+
+
+# Full-text search over title and description. SQLite keeps an external content FTS5
+# index in sync through triggers, PostgreSQL a generated tsvector column with a GIN index.
+# Neither is part of the ORM model, the search queries reach them by name.
+TASK_SEARCH_DDL = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)",
+    ],
+}
+
+for dialect, statements in TASK_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect=dialect))
+# The virtual table is not in the metadata, so drop_all would leave it behind.
+event.listen(Base.metadata, "after_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"))
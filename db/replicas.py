@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from decouple import Csv, config
+
+from .database import build_engine
+
+
+# Comma-separated SQLAlchemy URLs of read replicas, empty sends every read to the primary.
+DB_REPLICA_URLS = config('DB_REPLICA_URLS', default='', cast=Csv())
+# Seconds a user's reads stay on the primary after one of their own writes.
+DB_REPLICA_STICKINESS = config('DB_REPLICA_STICKINESS', default=5, cast=float)
+DB_REPLICA_HEALTH_INTERVAL = config('DB_REPLICA_HEALTH_INTERVAL', default=10, cast=float)
+DB_REPLICA_HEALTH_TIMEOUT = config('DB_REPLICA_HEALTH_TIMEOUT', default=2, cast=float)
+# PostgreSQL only: replicas replaying more than this many seconds behind are skipped.
+DB_REPLICA_MAX_LAG = config('DB_REPLICA_MAX_LAG', default=5, cast=float)
+
+# Seconds since the last replayed transaction, 0 when everything received is replayed.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session_maker = async_sessionmaker(engine)
+        self.healthy = True
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaSet:
+    '''Picks the replica serving a read, in turn among the healthy ones.
+    A user's reads go to the primary for stickiness seconds after their own writes,
+    and every read does while no replica is healthy. Writes are tracked per process,
+    so a read on another worker can still reach a replica that lags behind.'''
+
+    def __init__(self, replicas: List[Replica], stickiness: float, max_lag: float, timeout: float):
+        self.replicas = replicas
+        self.stickiness = stickiness
+        self.max_lag = max_lag
+        self.timeout = timeout
+        self.last_write: dict[int, float] = {}
+        self._turn = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def mark_write(self, user_id: int):
+        if self.replicas:
+            self.last_write[user_id] = time.monotonic()
+
+    def pick(self, user_id: int) -> Optional[Replica]:
+        '''Return the replica for a read of this user, None for the primary.'''
+        written = self.last_write.get(user_id)
+        if written is not None:
+            if time.monotonic() - written < self.stickiness:
+                return None
+            del self.last_write[user_id]
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        self._turn += 1
+        return healthy[self._turn % len(healthy)]
+
+    async def probe(self, replica: Replica) -> bool:
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with replica.engine.connect() as conn:
+                    if conn.dialect.name == 'postgresql':
+                        lag = await conn.scalar(REPLICA_LAG_QUERY)
+                        if lag > self.max_lag:
+                            logger.warning("Replica %s is %.1f s behind", replica.name, lag)
+                            return False
+                    else:
+                        await conn.execute(text("SELECT 1"))
+            return True
+        except Exception as error:
+            logger.warning("Replica %s is unavailable: %s", replica.name, error)
+            return False
+
+    async def check(self):
+        '''Probe every replica and forget writes older than the stickiness window.'''
+        results = await asyncio.gather(*(self.probe(replica) for replica in self.replicas))
+        for replica, healthy in zip(self.replicas, results):
+            replica.healthy = healthy
+        expired = time.monotonic() - self.stickiness
+        for user_id in [user_id for user_id, written in self.last_write.items() if written < expired]:
+            del self.last_write[user_id]
+
+    async def start(self, interval: float):
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self, interval: float):
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+
+replicas = ReplicaSet(
+    [Replica(build_engine(url)) for url in DB_REPLICA_URLS],
+    stickiness=DB_REPLICA_STICKINESS,
+    max_lag=DB_REPLICA_MAX_LAG,
+    timeout=DB_REPLICA_HEALTH_TIMEOUT,
+)
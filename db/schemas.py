@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 
 from .types import TaskStatus
 from datetime import datetime
@@ -52,6 +52,41 @@ class TaskResponse(BaseModel):
     description: str
     due_time: datetime
     status: TaskStatus
+
+
+class TaskPage(BaseModel):
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+    
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[TaskStatus, int]
+
+
+class TaskDueStats(BaseModel):
+    overdue: int
+    due_soon: Dict[str, int]
+
+
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int]
+
+class BulkItemError(BaseModel):
+    index: int
+    id: Optional[int] = None
+    detail: Union[str, List[Dict[str, Any]]]
+
+class TaskBulkResponse(BaseModel):
+    items: List[TaskResponse]
+    errors: List[BulkItemError]
+
+class TaskBulkDeleteResponse(BaseModel):
+    deleted: List[int]
+    errors: List[BulkItemError]
     
 
 class TaskHistoryCreate(BaseModel):
@@ -64,4 +99,33 @@ class TaskHistoryResponse(BaseModel):
     task_id: int
     status: TaskStatus
     due_time: datetime
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+
+class TaskHistoryPage(BaseModel):
+    items: List[TaskHistoryResponse]
+    next_cursor: Optional[str] = None
+
+
+class TaskHistoryList(BaseModel):
+    items: List[TaskHistoryResponse]
+
+class DatabaseHealth(BaseModel):
+    status: str
+    pool: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+
+
+class ReplicaHealth(BaseModel):
+    name: str
+    healthy: bool
+
+
+class CacheHealth(BaseModel):
+    backend: str
+    hits: int
+    misses: int
+    hit_ratio: float
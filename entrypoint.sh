@@ -6,9 +6,5 @@ set -e
 echo "Running database migrations..."
 uv run alembic upgrade head
 
-echo "Running tests..."
-
-uv run pytest tests/
-
 echo "Starting application..."
-uv run main.py
\ No newline at end of file
+exec uv run main.py
@@ -1,28 +1,119 @@
+import asyncio
 import contextlib
-import uvicorn
-from fastapi import FastAPI
-from db.database import create_test_db_and_tables
-from api import routers
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from decouple import config
 
+# Only decouple is imported eagerly: the process supervising uvicorn workers never
+# builds the app, and workers import FastAPI, SQLAlchemy and the routers in create_app.
+if TYPE_CHECKING:
+    from fastapi import FastAPI
 
-# @contextlib.asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     await create_test_db_and_tables()
-#     yield
 
+WEB_HOST = config('WEB_HOST', default='0.0.0.0')
+WEB_PORT = config('WEB_PORT', default=8000, cast=int)
+WEB_WORKERS = config('WEB_WORKERS', default=os.cpu_count() or 1, cast=int)
+# "auto" picks uvloop and httptools when they are installed.
+WEB_LOOP = config('WEB_LOOP', default='auto')
+WEB_HTTP = config('WEB_HTTP', default='auto')
+WEB_KEEP_ALIVE = config('WEB_KEEP_ALIVE', default=5, cast=int)
+WEB_GRACEFUL_TIMEOUT = config('WEB_GRACEFUL_TIMEOUT', default=30, cast=int)
 
-app = FastAPI()
 
-app.include_router(router=routers.auth_router, prefix="/auth", tags=["auth"])
-app.include_router(router=routers.task_router, prefix="/api", tags=["Tasks"])
-app.include_router(router=routers.task_history_router, prefix="/api", tags=["Task History"])
+async def warm_up_pool():
+    '''Open the first pool connections before traffic arrives.'''
+    from sqlalchemy import text
+    from db.database import engine, DB_POOL_SIZE, DB_POOL_WARMUP
 
-    
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(min(DB_POOL_WARMUP, DB_POOL_SIZE))))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: "FastAPI"):
+    from db.database import engine
+    from db.replicas import DB_REPLICA_HEALTH_INTERVAL, replicas
+    from api.events import task_events
+    from api.history_writer import history_writer
+    from api.retention import HISTORY_RETENTION_INTERVAL, history_retention
+    from api.scheduler import SCHEDULER_ENABLED, due_scheduler
+
+    # Every stop is registered before its start and runs in reverse order, even when
+    # serving, a start or another stop raised. Stopping a service that never started does nothing.
+    async with contextlib.AsyncExitStack() as stack:
+        stack.push_async_callback(engine.dispose)
+        await warm_up_pool()
+        stack.push_async_callback(replicas.stop)
+        await replicas.start(DB_REPLICA_HEALTH_INTERVAL)
+        stack.push_async_callback(task_events.stop)
+        await task_events.start()
+        stack.push_async_callback(history_writer.stop)
+        await history_writer.start()
+        stack.push_async_callback(history_retention.stop)
+        await history_retention.start(HISTORY_RETENTION_INTERVAL)
+        stack.push_async_callback(due_scheduler.stop)
+        if SCHEDULER_ENABLED:
+            await due_scheduler.start()
+        yield
+
+
+def create_app() -> "FastAPI":
+    '''Build the application, importing the routers and their dependencies on the first call.'''
+    from fastapi import FastAPI
+    from db.database import engine
+    from db.replicas import replicas
+    from api import routers
+    from api.metrics import InstrumentationMiddleware, instrument_engine
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(InstrumentationMiddleware)
+    instrument_engine(engine)
+    for replica in replicas.replicas:
+        instrument_engine(replica.engine)
+
+    app.include_router(router=routers.auth_router, prefix="/auth", tags=["auth"])
+    app.include_router(router=routers.task_router, prefix="/api", tags=["Tasks"])
+    app.include_router(router=routers.task_history_router, prefix="/api", tags=["Task History"])
+    app.include_router(router=routers.export_router, prefix="/api", tags=["Export"])
+    app.include_router(router=routers.events_router, prefix="/api", tags=["Events"])
+    app.include_router(router=routers.health_router, prefix="/health", tags=["Health"])
+    app.include_router(router=routers.metrics_router, tags=["Metrics"])
+    return app
+
+
+@lru_cache(maxsize=None)
+def get_app() -> "FastAPI":
+    return create_app()
+
+
+def __getattr__(name: str):
+    # main:app keeps working for uvicorn, tests and the load test, built on first access.
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def run():
+    '''Production entry point, every worker process builds its own app with create_app.'''
+    import uvicorn
 
-if __name__  == "__main__":
     uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
-        workers=1,
+        "main:create_app",
+        factory=True,
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=WEB_WORKERS,
+        loop=WEB_LOOP,
+        http=WEB_HTTP,
+        timeout_keep_alive=WEB_KEEP_ALIVE,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        lifespan="on",
     )
+
+
+if __name__  == "__main__":
+    run()
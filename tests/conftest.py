@@ -1,13 +1,15 @@
 import asyncio
+import os
 from typing import AsyncGenerator
 import pytest
 from httpx import ASGITransport, AsyncClient
 import pytest_asyncio
-from sqlalchemy import select
+from sqlalchemy import event, select, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from main import app
+from api.cache import InMemoryCacheBackend, task_list_cache
 from db.database import get_async_session
 from db.models import Base, User
 
@@ -56,6 +58,70 @@ async def client(db_session: AsyncSession):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def memory_cache(monkeypatch):
+    """Serve the task list cache from a fresh in-process backend, whatever TASK_CACHE_BACKEND is."""
+    monkeypatch.setattr(task_list_cache, "backend", InMemoryCacheBackend(maxsize=128, ttl=60))
+    yield task_list_cache
+
+
+def task_statements(statements):
+    """Keep the verbs of the statements touching tasks or their history."""
+    return [
+        statement.split()[0]
+        for statement in statements
+        if "tasks" in statement or "task_history" in statement
+    ]
+
+
+@pytest.fixture
+def statements():
+    """Collect the SQL statements sent to the test database while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine_test.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine_test.sync_engine, "before_cursor_execute", record)
+
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest_asyncio.fixture(params=["sqlite", "postgresql"])
+async def explain(request):
+    """Return a coroutine that renders the query plan of a select on the given backend.
+    The PostgreSQL run needs TEST_POSTGRES_URL and happens inside a rolled back transaction."""
+
+    if request.param == "sqlite":
+        async with engine_test.connect() as conn:
+            async def plan(query) -> str:
+                sql = query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+                rows = await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+                return "\n".join(row.detail for row in rows)
+            yield plan
+        return
+
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    pg_engine = create_async_engine(TEST_POSTGRES_URL, poolclass=StaticPool)
+    async with pg_engine.connect() as conn:
+        trans = await conn.begin()
+        await conn.run_sync(Base.metadata.create_all)
+        # Empty tables always favour a sequential scan, so ask the planner to prove the index is usable.
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+        async def plan(query) -> str:
+            sql = query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+            rows = await conn.execute(text(f"EXPLAIN {sql}"))
+            return "\n".join(row[0] for row in rows)
+        yield plan
+        await trans.rollback()
+    await pg_engine.dispose()
+
+
 USER_DATA = {
     "email": "test@example.com",
     "password": "testPassword"
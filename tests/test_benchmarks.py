@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.load import benchmark_database, compare, percentile, summarize
+from benchmarks.serialization import measure
+from benchmarks import startup
+
+# About twice a cold start on a developer laptop, the profile prints the actual figures.
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 1500))
+
+
+def test_percentiles_use_nearest_rank():
+    samples = [value / 1000 for value in range(1, 101)]
+
+    assert percentile(samples, 0.50) == 0.050
+    assert percentile(samples, 0.95) == 0.095
+    assert percentile(samples, 0.99) == 0.099
+    assert summarize(samples, errors=0, elapsed=2.0)["rps"] == 50.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"routes": {
+        "tasks_list": {"p95_ms": 10.0, "rps": 100.0, "errors": 0},
+        "task_detail": {"p95_ms": 10.0, "rps": 100.0, "errors": 0},
+    }}
+    current = {"routes": {
+        "tasks_list": {"p95_ms": 11.0, "rps": 95.0, "errors": 0},
+        "task_detail": {"p95_ms": 15.0, "rps": 70.0, "errors": 1},
+    }}
+
+    regressions = compare(baseline, current, threshold=0.2)
+
+    assert len(regressions) == 3
+    assert all(message.startswith("task_detail") for message in regressions)
+
+
+def test_existing_database_is_only_seeded_with_reset(tmp_path):
+    database = tmp_path / "app.sqlite"
+    assert benchmark_database(str(database), reset=False) == str(database)
+
+    database.write_bytes(b"SQLite format 3")
+    with pytest.raises(SystemExit):
+        benchmark_database(str(database), reset=False)
+    assert benchmark_database(str(database), reset=True) == str(database)
+    assert benchmark_database(None, reset=False).endswith("bench.sqlite")
+
+
+@pytest.mark.asyncio
+async def test_fast_serialization_matches_orm_output():
+    result = await measure(rows=200, repeat=1)
+
+    assert result["identical"]
+    assert result["fast_ms_per_10k"] > 0
+
+
+def test_importing_main_defers_the_application():
+    code = "import json, sys, main; print(json.dumps([name for name in ('fastapi', 'sqlalchemy', 'fastapi_users', 'api.routers') if name in sys.modules]))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout) == []
+
+
+def test_time_to_first_request_within_budget():
+    report = startup.measure(top=5)
+
+    assert report["status_code"] == 200
+    # The uvicorn supervisor only imports main. Before the factory it paid for the whole
+    # app too, so a multi-worker server reached its first request after two cold starts.
+    assert report["import_main_ms"] * 20 < report["time_to_first_request_ms"]
+    assert report["time_to_first_request_ms"] < STARTUP_BUDGET_MS
+    assert len(report["packages_ms"]) == 5
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from api.events import task_events
+from api.history_writer import history_writer
+from api.retention import history_retention
+from api.scheduler import due_scheduler
+from db.replicas import replicas
+
+
+@pytest.mark.asyncio
+async def test_lifespan_stops_every_service_when_serving_and_a_stop_fails(monkeypatch):
+    stopped = []
+
+    async def warm_up_pool():
+        pass
+
+    def recorder(name, error=None):
+        async def stop():
+            stopped.append(name)
+            if error:
+                raise error
+        return stop
+
+    monkeypatch.setattr(main, "warm_up_pool", warm_up_pool)
+    monkeypatch.setattr(due_scheduler, "stop", recorder("scheduler"))
+    monkeypatch.setattr(history_retention, "stop", recorder("retention"))
+    monkeypatch.setattr(history_writer, "stop", recorder("history_writer", RuntimeError("flush failed")))
+    monkeypatch.setattr(task_events, "stop", recorder("events"))
+    monkeypatch.setattr(replicas, "stop", recorder("replicas"))
+    monkeypatch.setattr("db.database.engine", SimpleNamespace(dispose=recorder("engine")))
+
+    with pytest.raises(RuntimeError) as raised:
+        async with main.lifespan(None):
+            raise ValueError("request handling crashed")
+    assert isinstance(raised.value.__context__, ValueError)
+
+    assert stopped == ["scheduler", "retention", "history_writer", "events", "replicas", "engine"]
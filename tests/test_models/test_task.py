@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from api.Task import TaskFilter, task_due_counts_query, task_list_columns, user_tasks_query
+from api.scheduler import MAX_ID, due_scheduler
+from api.search import search_tasks_query
+from api.pagination import PageParams, paginate_tasks
+from db.types import TaskStatus
+
+
+@pytest.mark.asyncio
+async def test_user_task_list_uses_composite_index(explain):
+    task_filter = TaskFilter(status=TaskStatus.NEW)
+    query = paginate_tasks(user_tasks_query(1, task_filter), PageParams(cursor=None, limit=50))
+
+    plan = await explain(query)
+
+    assert "ix_tasks_user_id_status_due_time" in plan
+
+
+@pytest.mark.asyncio
+async def test_unfiltered_user_task_list_reads_in_keyset_order(explain):
+    query = paginate_tasks(user_tasks_query(1, TaskFilter()), PageParams(cursor=None, limit=50))
+
+    plan = await explain(query)
+
+    assert "ix_tasks_user_id_due_time_id" in plan
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan
+
+
+@pytest.mark.asyncio
+async def test_unfiltered_all_task_list_reads_in_keyset_order(explain):
+    query = paginate_tasks(TaskFilter().filter(select(*task_list_columns(("id", "title")))), PageParams(cursor=None, limit=50))
+
+    plan = await explain(query)
+
+    assert "ix_tasks_due_time_id" in plan
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan
+
+
+@pytest.mark.asyncio
+async def test_task_due_counts_use_composite_index(explain):
+    now = datetime(2030, 1, 1)
+    plan = await explain(task_due_counts_query(1, now, [now + timedelta(days=1), now + timedelta(days=7)]))
+
+    assert "ix_tasks_user_id_status_due_time" in plan
+
+
+@pytest.mark.asyncio
+async def test_task_search_uses_full_text_index(explain, request):
+    dialect = request.node.callspec.params["explain"]
+    query = search_tasks_query(dialect, 1, "invoice", task_list_columns(("id", "title")))
+
+    plan = await explain(query)
+
+    assert ("tasks_fts VIRTUAL TABLE INDEX" in plan) if dialect == "sqlite" else ("ix_tasks_search_vector" in plan)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_loads_due_times_from_status_index(explain):
+    now = datetime(2030, 1, 1)
+    plan = await explain(due_scheduler.due_query((now, MAX_ID), now + timedelta(hours=1), 500))
+
+    assert "ix_tasks_status_due_time" in plan
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+
+from api.Task import TaskFilter
+from api.TaskHistory import latest_history_query, task_history_query
+from api.pagination import PageParams, paginate_history
+
+
+@pytest.mark.asyncio
+async def test_task_history_page_uses_id_index(explain):
+    plan = await explain(paginate_history(task_history_query(1, since=10), PageParams(cursor=None, limit=50)))
+
+    assert "ix_task_history_task_id_id" in plan
+
+
+@pytest.mark.asyncio
+async def test_task_history_since_timestamp_uses_created_at_index(explain):
+    plan = await explain(task_history_query(1, since=datetime(2030, 1, 1)))
+
+    assert "ix_task_history_task_id_created_at" in plan
+
+
+@pytest.mark.asyncio
+async def test_latest_history_seeks_task_ids_on_index(explain):
+    plan = await explain(latest_history_query(1, [1, 2, 3], TaskFilter(), 5))
+
+    # Either (task_id, ...) index serves the lookup, the planners pick one by cost.
+    assert "ix_task_history_task_id_" in plan
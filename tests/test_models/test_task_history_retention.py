@@ -0,0 +1,111 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.retention import HistoryRetention
+from db.models import Base, Task, TaskHistory, TaskHistoryArchive, User
+from db.types import TaskStatus
+
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest_asyncio.fixture
+async def history_db():
+    '''A separate database holding two tasks with 5 history rows each, one per day.'''
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{
+            "email": "retention@example.com", "hashed_password": "-",
+            "is_active": True, "is_superuser": False, "is_verified": True,
+        }])
+        await conn.execute(insert(Task), [
+            {"user_id": 1, "title": f"Task {number}", "description": "-", "due_time": NOW}
+            for number in range(2)
+        ])
+        await conn.execute(insert(TaskHistory), [
+            {"task_id": task_id, "status": TaskStatus.NEW, "due_time": NOW, "created_at": NOW - timedelta(days=age)}
+            for age in (40, 30, 20, 10, 0) for task_id in (1, 2)
+        ])
+    yield async_sessionmaker(engine)
+    await engine.dispose()
+
+
+async def remaining(session_maker, model) -> list:
+    async with session_maker() as session:
+        return (await session.execute(select(model.task_id, model.created_at).order_by(model.id))).all()
+
+
+@pytest.mark.asyncio
+async def test_old_history_is_moved_to_the_archive_in_batches(history_db):
+    retention = HistoryRetention(history_db, days=15, keep_last=0, target="archive", archive_dir="", batch_size=4)
+
+    assert await retention.run_once() == 6
+    assert await retention.run_once() == 0
+
+    kept = await remaining(history_db, TaskHistory)
+    archived = await remaining(history_db, TaskHistoryArchive)
+    assert len(kept) == 4 and all(created_at > NOW - timedelta(days=15) for _, created_at in kept)
+    assert len(archived) == 6 and all(created_at < NOW - timedelta(days=15) for _, created_at in archived)
+
+
+@pytest.mark.asyncio
+async def test_last_entries_per_task_are_kept(history_db):
+    retention = HistoryRetention(history_db, days=0, keep_last=2, target="archive", archive_dir="", batch_size=100)
+    assert await retention.run_once() == 6
+    kept = await remaining(history_db, TaskHistory)
+    assert sorted(task_id for task_id, _ in kept) == [1, 1, 2, 2]
+
+    # With both policies only rows that are old and not among the last entries move.
+    retention = HistoryRetention(history_db, days=5, keep_last=1, target="archive", archive_dir="", batch_size=100)
+    assert await retention.run_once() == 2
+    assert all(created_at > NOW - timedelta(days=5) for _, created_at in await remaining(history_db, TaskHistory))
+
+
+@pytest.mark.asyncio
+async def test_last_entries_are_kept_when_tasks_span_several_batches(history_db):
+    retention = HistoryRetention(history_db, days=25, keep_last=2, target="archive", archive_dir="", batch_size=1)
+
+    assert await retention.run_once() == 4
+    assert await retention.run_once() == 0
+    kept = await remaining(history_db, TaskHistory)
+    assert sorted(task_id for task_id, _ in kept) == [1, 1, 1, 2, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_last_entries_are_kept_for_a_full_batch_of_tasks(history_db):
+    async with history_db() as session:
+        await session.execute(insert(Task), [
+            {"user_id": 1, "title": f"Task {number}", "description": "-", "due_time": NOW}
+            for number in range(1200)
+        ])
+        await session.execute(insert(TaskHistory), [
+            {"task_id": task_id, "status": TaskStatus.NEW, "due_time": NOW, "created_at": NOW}
+            for task_id in range(3, 1203) for _ in range(3)
+        ])
+        await session.commit()
+    retention = HistoryRetention(history_db, days=0, keep_last=1, target="archive", archive_dir="", batch_size=1000)
+
+    assert await retention.run_once() == 2 * 1200 + 4 * 2
+    assert len(await remaining(history_db, TaskHistory)) == 1202
+
+
+@pytest.mark.asyncio
+async def test_old_history_can_be_exported_to_gzip_files(history_db, tmp_path):
+    retention = HistoryRetention(history_db, days=25, keep_last=0, target="file", archive_dir=str(tmp_path), batch_size=3)
+
+    assert await retention.run_once() == 4
+
+    [archive] = tmp_path.iterdir()
+    with gzip.open(archive, "rt") as lines:
+        rows = [json.loads(line) for line in lines]
+    assert sorted(row["task_id"] for row in rows) == [1, 1, 2, 2]
+    assert await remaining(history_db, TaskHistoryArchive) == []
+    assert len(await remaining(history_db, TaskHistory)) == 6
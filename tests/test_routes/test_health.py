@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_database_health(client):
+    response = await client.get("/health/db")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["pool"] == "AsyncAdaptedQueuePool"
+    assert data["size"] >= 1
+    assert data["checked_out"] >= 0
@@ -0,0 +1,46 @@
+import logging
+import re
+
+import pytest
+
+from api import metrics
+from api.metrics import instrument_engine, registry
+from tests.conftest import engine_test
+
+
+@pytest.mark.asyncio
+async def test_requests_report_server_timing_and_metrics(client, auth_token):
+    instrument_engine(engine_test)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get("/api/tasks/stats/", headers=headers)
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("app;dur=")
+    queries = re.search(r'db;dur=[0-9.]+;desc="(\d+) queries"', timing)
+    assert queries and int(queries.group(1)) >= 2
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'db_statements_total{method="GET",route="/api/tasks/stats/",status="200"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/tasks/stats/",status="200"}' in body
+    assert "db_slow_queries_total" in body
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_and_n_plus_one_are_logged(client, auth_token, monkeypatch, caplog):
+    instrument_engine(engine_test)
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(metrics, "N_PLUS_ONE_THRESHOLD", 0)
+    slow_queries = registry.slow_queries
+
+    with caplog.at_level(logging.WARNING, logger="api.metrics"):
+        response = await client.get("/api/tasks/stats/", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("Slow query") for message in messages)
+    assert any("possible N+1" in message and "/api/tasks/stats/" in message for message in messages)
+    assert registry.slow_queries > slow_queries
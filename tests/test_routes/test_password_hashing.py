@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+from pwdlib.hashers.bcrypt import BcryptHasher
+from sqlalchemy import select
+
+from api.passwords import PooledPasswordHelper
+from db.models import User
+
+
+class BlockingHash:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password: str) -> str:
+        self.release.wait(5)
+        return f"hashed:{password}"
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_off_the_event_loop(client):
+    blocking = BlockingHash()
+    helper = PooledPasswordHelper(blocking, workers=1)
+    first = asyncio.create_task(helper.hash_async("one"))
+    second = asyncio.create_task(helper.hash_async("two"))
+    while helper.running < 1:
+        await asyncio.sleep(0.01)
+
+    # Both hashes are pending, requests are still served.
+    response = await client.get("/health/db")
+    assert response.status_code == 200
+    assert (helper.running, helper.queued) == (1, 1)
+
+    blocking.release.set()
+    assert await asyncio.gather(first, second) == ["hashed:one", "hashed:two"]
+    assert helper.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_current_parameters(client, db_session):
+    db_session.add(User(
+        email="rehash@example.com",
+        hashed_password=BcryptHasher(rounds=4).hash("oldPassword"),
+        is_active=True,
+        is_superuser=False,
+        is_verified=False,
+    ))
+    await db_session.commit()
+
+    response = await client.post(
+        "/auth/login",
+        data={"username": "rehash@example.com", "password": "oldPassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 200
+
+    hashed_password = await db_session.scalar(select(User.hashed_password).where(User.email == "rehash@example.com"))
+    assert hashed_password.startswith("$argon2id$")
+
+    response = await client.post(
+        "/auth/login",
+        data={"username": "rehash@example.com", "password": "wrongPassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/metrics")
+    assert "password_hash_queue_depth 0" in response.text
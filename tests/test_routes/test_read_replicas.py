@@ -0,0 +1,102 @@
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from db.models import Base, Task, TaskHistory
+from db.replicas import Replica, replicas
+from db.types import TaskStatus
+
+REPLICA_PATH = "./test_replica.db"
+REPLICA_TASK_ID = 999999
+
+
+async def create_replica():
+    '''A replica database holding one task of user 1 that the primary does not have.'''
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{REPLICA_PATH}", poolclass=StaticPool)
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        due_time = datetime(2099, 1, 1)
+        await conn.execute(Task.__table__.insert().values(
+            id=REPLICA_TASK_ID, title="Replica only", description="Only on the replica.",
+            user_id=1, status=TaskStatus.NEW, due_time=due_time, created_at=due_time, version=1,
+        ))
+        await conn.execute(TaskHistory.__table__.insert().values(
+            task_id=REPLICA_TASK_ID, status=TaskStatus.NEW, due_time=due_time, created_at=due_time,
+        ))
+    return replica_engine
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_until_own_write_or_failure(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    replica_engine = await create_replica()
+    saved = replicas.replicas
+    replicas.replicas = [Replica(replica_engine)]
+    replicas.last_write.clear()
+    try:
+        response = await client.get(
+            "/api/all_tasks/", params={"due_time__gte": "2099-01-01T00:00:00", "fields": "id,title"}, headers=headers
+        )
+        assert [task["title"] for task in response.json()["items"]] == ["Replica only"]
+        response = await client.get(f"/api/task/{REPLICA_TASK_ID}/history/", headers=headers)
+        assert response.status_code == 200
+
+        # The user's own write keeps their reads on the primary.
+        response = await client.post(
+            "/api/task/",
+            json={"title": "Primary", "description": "Written to the primary.", "due_time": "2037-01-01T12:00:00"},
+            headers=headers
+        )
+        written = response.json()["id"]
+        response = await client.get(f"/api/task/{REPLICA_TASK_ID}/history/", headers=headers)
+        assert response.status_code == 404
+
+        # An unreachable replica is skipped once the health check has seen it.
+        replicas.last_write.clear()
+        replicas.replicas = [Replica(create_async_engine("sqlite+aiosqlite:////nonexistent/replica.db"))]
+        response = await client.get("/health/replicas")
+        assert [replica["healthy"] for replica in response.json()] == [False]
+        response = await client.get(f"/api/task/{REPLICA_TASK_ID}/history/", headers=headers)
+        assert response.status_code == 404
+    finally:
+        replicas.replicas = saved
+        replicas.last_write.clear()
+        await replica_engine.dispose()
+        os.remove(REPLICA_PATH)
+
+    await client.delete(f"/api/task/{written}/", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_task_list_pages_read_from_a_replica_are_cached_for_the_stickiness_window(client, auth_token, memory_cache):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    params = {"due_time__gte": "2099-01-01T00:00:00", "fields": "id,title"}
+    replica_engine = await create_replica()
+    saved, stickiness = replicas.replicas, replicas.stickiness
+    replicas.replicas = [Replica(replica_engine)]
+    replicas.stickiness = 0
+    replicas.last_write.clear()
+    try:
+        response = await client.get("/api/tasks/", params=params, headers=headers)
+        assert [task["title"] for task in response.json()["items"]] == ["Replica only"]
+
+        # Without a stickiness window the replica page is not cached, the primary answers.
+        replicas.replicas = []
+        response = await client.get("/api/tasks/", params=params, headers=headers)
+        assert response.json()["items"] == []
+
+        # Within the window the cached replica page is served.
+        params["limit"] = 10
+        replicas.replicas = [Replica(replica_engine)]
+        replicas.stickiness = 60
+        await client.get("/api/tasks/", params=params, headers=headers)
+        replicas.replicas = []
+        response = await client.get("/api/tasks/", params=params, headers=headers)
+        assert [task["title"] for task in response.json()["items"]] == ["Replica only"]
+    finally:
+        replicas.replicas, replicas.stickiness = saved, stickiness
+        await replica_engine.dispose()
+        os.remove(REPLICA_PATH)
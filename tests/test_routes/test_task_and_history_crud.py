@@ -62,7 +62,8 @@ async def test_task_list(client, auth_token):
     )
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
+    assert isinstance(data["items"], list)
+    assert data["next_cursor"] is None
 
 @pytest.mark.asyncio
 async def test_task_detail(client, auth_token):
@@ -91,7 +92,7 @@ async def test_task_history_list(client, auth_token):
     )
 
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["items"]
     assert isinstance(data, list)
     task_history = data[0]
     assert task_history["id"] == task_history_data["id"]
@@ -132,7 +133,7 @@ async def test_task_history_after_task_update(client, auth_token):
     )
 
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["items"]
     assert isinstance(data, list)
     for task_history in data:
         print(task_history)
@@ -161,7 +162,7 @@ async def test_task_history_deletion_by_id(client, auth_token):
     )
     
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["items"]
     assert isinstance(data, list)
     assert not any(history["id"] == task_history_data["id"] for history in data)
 
@@ -182,7 +183,7 @@ async def test_task_history_deletion_by_task_id(client, auth_token):
     )
     
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["items"]
     assert isinstance(data, list)
     assert not data
 
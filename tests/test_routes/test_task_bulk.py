@@ -0,0 +1,121 @@
+import pytest
+
+from tests.conftest import task_statements
+
+BULK_CREATE_DATA = [
+        {
+            "title": "Bulk task 1",
+            "description": "First task created in bulk.",
+            "due_time": "2032-01-01T10:00:00"
+        },
+        {
+            "title": "Bulk task 2",
+            "description": "Second task created in bulk.",
+            "due_time": "2032-01-02T10:00:00",
+            "status": "in_progress"
+        },
+        {
+            "title": "Invalid bulk task",
+            "due_time": "not a date"
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_task_bulk_lifecycle(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.post("/api/tasks/bulk/", json=BULK_CREATE_DATA, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [task["title"] for task in data["items"]] == ["Bulk task 1", "Bulk task 2"]
+    assert data["items"][1]["status"] == "in_progress"
+    assert [error["index"] for error in data["errors"]] == [2]
+    first_id, second_id = (task["id"] for task in data["items"])
+
+    response = await client.get(f"/api/task/{first_id}/history/", headers=headers)
+    assert response.status_code == 200
+    assert [history["status"] for history in response.json()["items"]] == ["new"]
+
+    response = await client.put(
+        "/api/tasks/bulk/",
+        json=[
+            {"id": first_id, "status": "done"},
+            {"id": 999999, "status": "done"},
+            {"title": "Missing id"},
+        ],
+        headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [(task["id"], task["status"]) for task in data["items"]] == [(first_id, "done")]
+    assert data["items"][0]["title"] == "Bulk task 1"
+    assert sorted((error["index"], error["id"]) for error in data["errors"]) == [(1, 999999), (2, None)]
+
+    response = await client.get(f"/api/task/{first_id}/history/", headers=headers)
+    assert [history["status"] for history in response.json()["items"]] == ["new", "done"]
+
+    response = await client.post(
+        "/api/tasks/bulk/delete/",
+        json={"ids": [first_id, second_id, 999999]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["deleted"] == sorted([first_id, second_id])
+    assert [error["id"] for error in data["errors"]] == [999999]
+
+    response = await client.get(f"/api/task/{first_id}", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_repeated_ids_in_a_bulk_update_are_rejected(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post("/api/tasks/bulk/", json=BULK_CREATE_DATA[:2], headers=headers)
+    first_id, second_id = (task["id"] for task in response.json()["items"])
+
+    response = await client.put(
+        "/api/tasks/bulk/",
+        json=[
+            {"id": first_id, "status": "done"},
+            {"id": second_id, "status": "done"},
+            {"id": first_id, "status": "in_progress"},
+        ],
+        headers=headers
+    )
+    data = response.json()
+    assert [task["id"] for task in data["items"]] == [second_id]
+    assert sorted((error["index"], error["id"]) for error in data["errors"]) == [(0, first_id), (2, first_id)]
+
+    response = await client.get(f"/api/task/{first_id}", headers=headers)
+    assert response.json()["status"] == "new"
+
+    await client.post("/api/tasks/bulk/delete/", json={"ids": [first_id, second_id]}, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_bulk_routes_send_the_same_statements_for_any_batch_size(client, auth_token, statements):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    executed = []
+    for size in (2, 20):
+        statements.clear()
+        response = await client.post("/api/tasks/bulk/", json=[
+            {"title": f"Batch task {number}", "description": "Counted.", "due_time": "2033-01-01T10:00:00"}
+            for number in range(size)
+        ], headers=headers)
+        task_ids = [task["id"] for task in response.json()["items"]]
+        created = task_statements(statements)
+
+        statements.clear()
+        await client.put(
+            "/api/tasks/bulk/", json=[{"id": task_id, "status": "done"} for task_id in task_ids], headers=headers
+        )
+        updated = task_statements(statements)
+
+        statements.clear()
+        await client.post("/api/tasks/bulk/delete/", json={"ids": task_ids}, headers=headers)
+        executed.append((created, updated, task_statements(statements)))
+
+    assert executed[0] == executed[1]
+    assert executed[0] == (["INSERT", "INSERT"], ["SELECT", "UPDATE", "INSERT"], ["DELETE", "DELETE"])
@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_task_and_history_conditional_get(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post(
+        "/api/task/",
+        json={
+            "title": "ETag task",
+            "description": "Task used by the conditional GET tests.",
+            "due_time": "2033-01-01T00:00:00"
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+
+    for url in (f"/api/task/{task_id}", f"/api/task/{task_id}/history/"):
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        response = await client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    task_etag = (await client.get(f"/api/task/{task_id}", headers=headers)).headers["ETag"]
+    history_etag = (await client.get(f"/api/task/{task_id}/history/", headers=headers)).headers["ETag"]
+
+    response = await client.put(f"/api/task/{task_id}/", json={"status": "done"}, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get(f"/api/task/{task_id}", headers={**headers, "If-None-Match": task_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != task_etag
+    task_etag = response.headers["ETag"]
+
+    response = await client.get(f"/api/task/{task_id}/history/", headers={**headers, "If-None-Match": history_etag})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+
+    response = await client.put("/api/tasks/bulk/", json=[{"id": task_id, "title": "Renamed"}], headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get(f"/api/task/{task_id}", headers={**headers, "If-None-Match": task_etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
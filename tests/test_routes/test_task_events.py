@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from api.events import EventHub, LocalBroker, event_stream, task_events
+
+
+@pytest.mark.asyncio
+async def test_task_changes_are_pushed_to_subscribers(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_id = 1
+    backlog, queue = task_events.subscribe(user_id)
+    try:
+        response = await client.post(
+            "/api/task/",
+            json={
+                "title": "Event task",
+                "description": "Task used by the event tests.",
+                "due_time": "2037-01-01T12:00:00"
+            },
+            headers=headers
+        )
+        task_id = response.json()["id"]
+        assert response.json()["user_id"] == user_id
+        await client.put(f"/api/task/{task_id}/", json={"status": "done"}, headers=headers)
+        await client.delete(f"/api/task/{task_id}/", headers=headers)
+
+        events = [queue.get_nowait() for _ in range(queue.qsize())]
+    finally:
+        task_events.unsubscribe(user_id, queue)
+
+    assert backlog == []
+    assert [event["type"] for event in events] == ["task.created", "task.updated", "task.deleted"]
+    assert events[1]["data"]["status"] == "done"
+    assert events[2]["data"] == {"id": task_id}
+    ids = [event["id"] for event in events]
+    assert ids == sorted(set(ids))
+
+
+@pytest.mark.asyncio
+async def test_event_stream_resumes_from_last_event_id():
+    hub = EventHub(LocalBroker(), buffer_size=2, queue_size=10, resume_window=60)
+    for number in range(3):
+        await hub.publish(1, "task.updated", [{"id": number}])
+    await hub.publish(2, "task.updated", [{"id": 99}])
+    buffered = list(hub.buffers[1])
+    assert [event["data"]["id"] for event in buffered] == [1, 2]
+
+    stream = event_stream(hub, 1, buffered[0]["id"])
+    assert await anext(stream) == f'id: {buffered[1]["id"]}\nevent: task.updated\ndata: {{"id": 2}}\n\n'
+
+    await hub.publish(1, "task.deleted", [{"id": 2}])
+    chunk = await asyncio.wait_for(anext(stream), 1)
+    assert chunk.startswith("id: ") and "event: task.deleted" in chunk
+
+    await stream.aclose()
+    assert 1 not in hub.subscribers
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected():
+    hub = EventHub(LocalBroker(), buffer_size=10, queue_size=2, resume_window=60)
+    stream = event_stream(hub, 1, None)
+    pending = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+
+    await hub.publish(1, "task.updated", [{"id": number} for number in range(3)])
+    # The queue overflowed before the stream read it, so it ends and the client resumes from the buffer.
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(pending, 1)
+    assert len(hub.buffers[1]) == 3
+
+
+@pytest.mark.asyncio
+async def test_idle_buffers_are_dropped_after_the_resume_window(monkeypatch):
+    hub = EventHub(LocalBroker(), buffer_size=10, queue_size=10, resume_window=60)
+    await hub.publish(1, "task.updated", [{"id": 1}])
+    [event] = hub.buffers[1]
+
+    later = time.time_ns() + 120 * 1_000_000_000
+    monkeypatch.setattr("api.events.time.time_ns", lambda: later)
+    await hub.publish(2, "task.updated", [{"id": 2}])
+    assert list(hub.buffers) == [2]
+
+    backlog, queue = hub.subscribe(1, event["id"] - 1)
+    assert backlog == []
+    hub.unsubscribe(1, queue)
+
+
+@pytest.mark.asyncio
+async def test_task_events_require_authentication(client):
+    response = await client.get("/api/tasks/events/")
+    assert response.status_code == 401
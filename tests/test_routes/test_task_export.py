@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+
+import pytest
+
+EXPORT_FILTER = {
+        "due_time__gte": "2031-01-01T00:00:00",
+        "due_time__lte": "2031-12-31T23:59:59",
+    }
+
+
+@pytest.mark.asyncio
+async def test_task_export_formats(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    created_ids = []
+    for month in (1, 2, 3):
+        response = await client.post(
+            "/api/task/",
+            json={
+                "title": f"Export task {month}",
+                "description": "Task, with a comma, used by the export tests.",
+                "due_time": f"2031-{month:02d}-01T09:00:00"
+            },
+            headers=headers
+        )
+        assert response.status_code == 201
+        created_ids.append(response.json()["id"])
+
+    response = await client.get("/api/tasks/export/", params=EXPORT_FILTER, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == created_ids
+    assert rows[0]["status"] == "new"
+    assert rows[0]["due_time"] == "2031-01-01T09:00:00"
+
+    response = await client.get(
+        "/api/tasks/export/", params={**EXPORT_FILTER, "format": "csv"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == created_ids
+    assert rows[0]["description"] == "Task, with a comma, used by the export tests."
+
+
+@pytest.mark.asyncio
+async def test_task_history_export(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get("/api/tasks/history/export/", headers=headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows
+    assert set(rows[0]) == {"id", "task_id", "status", "due_time", "created_at"}
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
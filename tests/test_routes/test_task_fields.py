@@ -0,0 +1,60 @@
+import pytest
+
+PAGE_FILTER = {
+        "due_time__gte": "2039-01-01T00:00:00",
+        "due_time__lte": "2039-01-31T23:59:59",
+    }
+
+
+@pytest.mark.asyncio
+async def test_task_reads_return_only_requested_fields(client, auth_token, statements):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    created = []
+    for day in (2, 1, 3):
+        response = await client.post(
+            "/api/task/",
+            json={
+                "title": f"Sparse task {day}",
+                "description": "Long description the list view does not need. " * 8,
+                "due_time": f"2039-01-{day:02d}T12:00:00"
+            },
+            headers=headers
+        )
+        created.append(response.json()["id"])
+
+    statements.clear()
+    response = await client.get(
+        "/api/tasks/", params={**PAGE_FILTER, "fields": "title,id,status", "limit": 2}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [list(task) for task in data["items"]] == [["id", "title", "status"]] * 2
+    assert [task["title"] for task in data["items"]] == ["Sparse task 1", "Sparse task 2"]
+    assert not any("description" in statement for statement in statements if "FROM tasks" in statement)
+
+    response = await client.get(
+        "/api/tasks/",
+        params={**PAGE_FILTER, "fields": "title", "limit": 2, "cursor": data["next_cursor"]},
+        headers=headers
+    )
+    assert response.json() == {"items": [{"title": "Sparse task 3"}], "next_cursor": None}
+
+    response = await client.get("/api/all_tasks/", params={**PAGE_FILTER, "fields": "due_time"}, headers=headers)
+    assert response.json()["items"][0] == {"due_time": "2039-01-01T12:00:00"}
+
+    response = await client.get(f"/api/task/{created[0]}", params={"fields": "status,title"}, headers=headers)
+    assert response.json() == {"title": "Sparse task 2", "status": "new"}
+    sparse_etag = response.headers["ETag"]
+
+    response = await client.get(f"/api/task/{created[0]}", headers=headers)
+    assert set(response.json()) == {"id", "user_id", "created_at", "title", "description", "due_time", "status"}
+    assert response.headers["ETag"] != sparse_etag
+
+
+@pytest.mark.asyncio
+async def test_unknown_fields_are_rejected(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get("/api/tasks/", params={"fields": "title,password"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: password"
@@ -0,0 +1,69 @@
+import pytest
+
+
+async def create_task_with_history(client, headers, title: str, updates: int) -> int:
+    response = await client.post(
+        "/api/task/",
+        json={"title": title, "description": "Task used by the latest history tests.", "due_time": "2036-01-01T12:00:00"},
+        headers=headers
+    )
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+    for status in ("in_progress", "done", "new")[:updates]:
+        response = await client.put(f"/api/task/{task_id}/", json={"status": status}, headers=headers)
+        assert response.status_code == 200
+    return task_id
+
+
+@pytest.mark.asyncio
+async def test_latest_history_of_many_tasks_in_one_query(client, auth_token, statements):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    first = await create_task_with_history(client, headers, "Latest history one", 3)
+    second = await create_task_with_history(client, headers, "Latest history two", 1)
+
+    statements.clear()
+    response = await client.get(
+        "/api/tasks/history/latest/",
+        params={"task_id": [first, second, 10 ** 6], "per_task": 2},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert sum("task_history" in statement for statement in statements) == 1
+    items = response.json()["items"]
+    assert [(item["task_id"], item["status"]) for item in items] == [
+        (first, "new"), (first, "done"), (second, "in_progress"), (second, "new")
+    ]
+    assert items[0]["id"] > items[1]["id"]
+
+    response = await client.get(
+        "/api/tasks/history/latest/",
+        params={"task_id": [first, second], "status": "in_progress", "per_task": 1},
+        headers=headers
+    )
+    assert [item["task_id"] for item in response.json()["items"]] == [second]
+
+    for task_id in (first, second):
+        await client.delete(f"/api/task/{task_id}/", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_latest_history_excludes_other_users_tasks(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post("/auth/register", json={"email": "latest@example.com", "password": "otherPassword"})
+    assert response.status_code == 200
+    response = await client.post(
+        "/auth/login",
+        data={"username": "latest@example.com", "password": "otherPassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    other_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    task_id = await create_task_with_history(client, headers, "Not shared", 1)
+
+    response = await client.get("/api/tasks/history/latest/", params={"task_id": [task_id]}, headers=other_headers)
+    assert response.json() == {"items": []}
+
+    response = await client.get(
+        "/api/tasks/history/latest/", params={"task_id": list(range(1, 300))}, headers=headers
+    )
+    assert response.status_code == 400
+    await client.delete(f"/api/task/{task_id}/", headers=headers)
@@ -0,0 +1,71 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_task_history_pages_and_since(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post(
+        "/api/task/",
+        json={
+            "title": "History paging task",
+            "description": "Task used by the history pagination tests.",
+            "due_time": "2035-01-01T12:00:00"
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+    for status in ("in_progress", "done", "new", "in_progress"):
+        response = await client.put(f"/api/task/{task_id}/", json={"status": status}, headers=headers)
+        assert response.status_code == 200
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(f"/api/task/{task_id}/history/", params=params, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(data["items"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    ids = [history["id"] for history in seen]
+    assert ids == sorted(ids) and len(ids) == 5
+    assert [history["status"] for history in seen] == ["new", "in_progress", "done", "new", "in_progress"]
+
+    response = await client.get(f"/api/task/{task_id}/history/", params={"since": ids[2]}, headers=headers)
+    assert [history["id"] for history in response.json()["items"]] == ids[3:]
+
+    response = await client.get(f"/api/task/{task_id}/history/", params={"since": ids[-1]}, headers=headers)
+    assert response.json() == {"items": [], "next_cursor": None}
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        f"/api/task/{task_id}/history/",
+        params={"since": ids[-1]},
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = await client.get(f"/api/task/{task_id}/history/", params={"since": "2000-01-01T00:00:00Z"}, headers=headers)
+    assert len(response.json()["items"]) == 5
+
+
+@pytest.mark.asyncio
+async def test_task_history_rejects_bad_since_and_cursor(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.get("/api/all_tasks/", params={"limit": 1}, headers=headers)
+    task_id = response.json()["items"][0]["id"]
+
+    response = await client.get(f"/api/task/{task_id}/history/", params={"since": "yesterday"}, headers=headers)
+    assert response.status_code == 400
+
+    response = await client.get(f"/api/task/{task_id}/history/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
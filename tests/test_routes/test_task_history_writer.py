@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from api.history_writer import HistoryWriter
+from db.models import TaskHistory
+from db.types import TaskStatus
+from db.utils.time_utils import get_datetime_now
+
+
+@pytest.mark.asyncio
+async def test_async_history_is_batched_and_flushed_on_stop(client, auth_token, db_session, statements):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post(
+        "/api/task/",
+        json={
+            "title": "Write-behind task",
+            "description": "Task used by the history writer tests.",
+            "due_time": "2038-01-01T12:00:00"
+        },
+        headers=headers
+    )
+    task = response.json()
+
+    session_maker = async_sessionmaker(db_session.bind)
+    writer = HistoryWriter("async", session_maker, queue_size=2, batch_size=3, flush_interval=60)
+    entries = [
+        {"task_id": task["id"], "status": TaskStatus.DONE, "due_time": datetime(2038, 1, 1, 12)}
+        for _ in range(5)
+    ]
+
+    statements.clear()
+    async with session_maker() as session:
+        # The queue holds 2 entries, so this only returns once the writer took the first batch.
+        await asyncio.wait_for(writer.commit(session, entries), 5)
+    await writer.stop()
+
+    inserts = [statement for statement in statements if statement.startswith("INSERT INTO task_history")]
+    assert len(inserts) == 2
+
+    async with session_maker() as session:
+        count = await session.scalar(
+            select(func.count()).select_from(TaskHistory).where(TaskHistory.task_id == task["id"])
+        )
+    assert count == 6
+
+
+def test_unknown_history_mode_is_rejected():
+    with pytest.raises(ValueError):
+        HistoryWriter("eventually", None, queue_size=1, batch_size=1, flush_interval=1)
+
+
+@pytest.mark.asyncio
+async def test_async_history_skips_tasks_deleted_before_the_flush(client, auth_token, db_session):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    task_ids = []
+    for title in ("Kept task", "Deleted task"):
+        response = await client.post(
+            "/api/task/",
+            json={"title": title, "description": "Task used by the history writer tests.", "due_time": "2038-01-01T12:00:00"},
+            headers=headers
+        )
+        task_ids.append(response.json()["id"])
+    kept, deleted = task_ids
+
+    await db_session.commit()
+    await db_session.execute(text("PRAGMA foreign_keys=ON"))
+    try:
+        session_maker = async_sessionmaker(db_session.bind)
+        writer = HistoryWriter("async", session_maker, queue_size=10, batch_size=10, flush_interval=60)
+        async with session_maker() as session:
+            await writer.commit(session, [
+                {"task_id": task_id, "status": TaskStatus.DONE, "due_time": datetime(2038, 1, 1, 12)}
+                for task_id in task_ids
+            ])
+        response = await client.delete(f"/api/task/{deleted}/", headers=headers)
+        assert response.status_code == 204
+        await writer.stop()
+
+        async with session_maker() as session:
+            rows = (await session.execute(
+                select(TaskHistory.task_id, TaskHistory.status).where(TaskHistory.task_id.in_(task_ids))
+            )).all()
+    finally:
+        await db_session.commit()
+        await db_session.execute(text("PRAGMA foreign_keys=OFF"))
+
+    assert set(rows) == {(kept, TaskStatus.NEW), (kept, TaskStatus.DONE)}
+    await client.delete(f"/api/task/{kept}/", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_async_history_is_found_when_polling_since_a_timestamp(client, auth_token, db_session):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post(
+        "/api/task/",
+        json={"title": "Polled task", "description": "Task used by the history writer tests.", "due_time": "2038-01-01T12:00:00"},
+        headers=headers
+    )
+    task_id = response.json()["id"]
+    session_maker = async_sessionmaker(db_session.bind)
+    writer = HistoryWriter("async", session_maker, queue_size=10, batch_size=10, flush_interval=60)
+
+    async with session_maker() as session:
+        await writer.commit(session, [{"task_id": task_id, "status": TaskStatus.DONE, "due_time": datetime(2038, 1, 1, 12)}])
+    # Meanwhile another worker writes an entry, which the client sees first.
+    await asyncio.sleep(0.01)
+    async with session_maker() as session:
+        await session.execute(insert(TaskHistory), [
+            {"task_id": task_id, "status": TaskStatus.IN_PROGRESS, "due_time": datetime(2038, 1, 1, 12), "created_at": get_datetime_now()}
+        ])
+        await session.commit()
+    response = await client.get(f"/api/task/{task_id}/history/", headers=headers)
+    last_seen = response.json()["items"][-1]["created_at"]
+
+    await writer.stop()
+    response = await client.get(f"/api/task/{task_id}/history/", params={"since": last_seen}, headers=headers)
+    assert [entry["status"] for entry in response.json()["items"]] == ["done"]
+    await client.delete(f"/api/task/{task_id}/", headers=headers)
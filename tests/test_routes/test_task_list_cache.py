@@ -0,0 +1,114 @@
+import pytest
+
+from api.cache import InMemoryCacheBackend, RedisCacheBackend, ResponseCache, build_backend
+
+CACHE_FILTER = {
+        "due_time__gte": "2034-01-01T00:00:00",
+        "due_time__lte": "2034-12-31T23:59:59",
+    }
+
+
+class FakeRedis:
+    """Minimal stand-in for redis.asyncio.Redis."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+@pytest.mark.asyncio
+async def test_task_list_is_cached_and_invalidated(client, auth_token, memory_cache):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get("/api/tasks/", params=CACHE_FILTER, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    stats = (await client.get("/health/cache")).json()
+
+    response = await client.get("/api/tasks/", params=CACHE_FILTER, headers=headers)
+    assert response.json()["items"] == []
+    assert (await client.get("/health/cache")).json()["hits"] == stats["hits"] + 1
+
+    response = await client.post(
+        "/api/task/",
+        json={
+            "title": "Cached task",
+            "description": "Task used by the list cache tests.",
+            "due_time": "2034-06-01T00:00:00"
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+
+    response = await client.get("/api/tasks/", params=CACHE_FILTER, headers=headers)
+    assert [task["id"] for task in response.json()["items"]] == [task_id]
+
+    response = await client.put(f"/api/task/{task_id}/", json={"title": "Renamed"}, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/tasks/", params=CACHE_FILTER, headers=headers)
+    assert response.json()["items"][0]["title"] == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_generations():
+    cache = ResponseCache(RedisCacheBackend(FakeRedis()), namespace="tasks", ttl=60)
+
+    key = await cache.key(1, {"limit": 50})
+    assert await cache.get(key) is None
+    await cache.set(key, b"[]")
+    assert await cache.get(key) == b"[]"
+    assert await cache.key(1, {"limit": 50}) == key
+
+    await cache.invalidate(1)
+
+    new_key = await cache.key(1, {"limit": 50})
+    assert new_key != key
+    assert await cache.get(new_key) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_drops_idle_generations(monkeypatch):
+    backend = InMemoryCacheBackend(maxsize=16, ttl=60)
+    cache = ResponseCache(backend, namespace="tasks", ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr("api.cache.time.monotonic", lambda: clock[0])
+
+    stale_key = await cache.key(1, {"limit": 50})
+    await cache.set(stale_key, b"stale")
+    await cache.invalidate(1)
+    fresh_key = await cache.key(1, {"limit": 50})
+    await cache.set(fresh_key, b"fresh")
+    assert await cache.get(fresh_key) == b"fresh"
+
+    # Once user 1 is idle for the ttl, the next write drops its generation.
+    clock[0] += 61
+    await cache.invalidate(2)
+    assert list(backend.counters) == ["tasks:2:gen"]
+    # Its reads fall back to the first generation, whose entries have expired.
+    key = await cache.key(1, {"limit": 50})
+    assert key == stale_key
+    assert await cache.get(key) is None
+    await cache.set(key, b"current")
+
+    # A later invalidation still never resolves to a generation user 1 used before.
+    await cache.invalidate(1)
+    assert await cache.key(1, {"limit": 50}) not in (stale_key, fresh_key)
+
+
+def test_memory_backend_needs_a_single_worker():
+    with pytest.raises(ValueError):
+        build_backend("memory", workers=4)
+    assert type(build_backend("none", workers=4)).__name__ == "NullCacheBackend"
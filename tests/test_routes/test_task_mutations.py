@@ -0,0 +1,57 @@
+import pytest
+
+from tests.conftest import task_statements
+
+
+@pytest.mark.asyncio
+async def test_mutations_check_ownership_in_the_statement(client, auth_token, statements):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post(
+        "/api/task/",
+        json={
+            "title": "Mutation task",
+            "description": "Task used by the mutation tests.",
+            "due_time": "2036-01-01T12:00:00"
+        },
+        headers=headers
+    )
+    task_id = response.json()["id"]
+    await client.put(f"/api/task/{task_id}/", json={"status": "done"}, headers=headers)
+    history_id = (await client.get(f"/api/task/{task_id}/history/", headers=headers)).json()["items"][0]["id"]
+
+    statements.clear()
+    response = await client.put(f"/api/task/{task_id}/", json={"title": "Renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+    assert response.json()["status"] == "done"
+    assert task_statements(statements) == ["UPDATE", "INSERT"]
+
+    statements.clear()
+    response = await client.delete(f"/api/task/history/{history_id}/", headers=headers)
+    assert response.status_code == 204
+    assert task_statements(statements) == ["DELETE"]
+
+    statements.clear()
+    response = await client.delete(f"/api/task/{task_id}/history/", headers=headers)
+    assert response.status_code == 204
+    assert task_statements(statements) == ["DELETE"]
+
+    response = await client.delete(f"/api/task/{task_id}/history/", headers=headers)
+    assert response.status_code == 404
+
+    statements.clear()
+    response = await client.delete(f"/api/task/{task_id}/", headers=headers)
+    assert response.status_code == 204
+    assert task_statements(statements) == ["DELETE", "DELETE"]
+
+
+@pytest.mark.asyncio
+async def test_mutations_of_missing_rows_return_404(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.put("/api/task/999999/", json={"title": "Nope"}, headers=headers)
+    assert response.status_code == 404
+    response = await client.delete("/api/task/999999/", headers=headers)
+    assert response.status_code == 404
+    response = await client.delete("/api/task/history/999999/", headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,57 @@
+import pytest
+
+PAGE_FILTER = {
+        "due_time__gte": "2030-01-01T00:00:00",
+        "due_time__lte": "2030-01-31T23:59:59",
+    }
+
+
+@pytest.mark.asyncio
+async def test_task_list_keyset_pagination(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    created_ids = []
+    for day in (5, 3, 3, 1, 4):
+        response = await client.post(
+            "/api/task/",
+            json={
+                "title": f"Paged task {day}",
+                "description": "Task used by the pagination tests.",
+                "due_time": f"2030-01-{day:02d}T12:00:00"
+            },
+            headers=headers
+        )
+        assert response.status_code == 201
+        created_ids.append(response.json()["id"])
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {**PAGE_FILTER, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/tasks/", params=params, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) <= 2
+        seen.extend(data["items"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert sorted(task["id"] for task in seen) == sorted(created_ids)
+    keys = [(task["due_time"], task["id"]) for task in seen]
+    assert keys == sorted(keys)
+
+
+@pytest.mark.asyncio
+async def test_task_list_rejects_bad_page_params(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get("/api/tasks/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+    response = await client.get("/api/tasks/", params={"limit": 100000}, headers=headers)
+    assert response.status_code == 422
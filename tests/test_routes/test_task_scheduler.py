@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from api.events import task_events
+from api.scheduler import DueScheduler, utc_now
+from db.models import Task, TaskHistory
+from db.types import TaskStatus
+from tests.conftest import TestingSessionLocal
+
+
+def due_in(seconds: float) -> str:
+    return (datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=seconds)).isoformat()
+
+
+async def create_task(client, headers, title: str, due_time: str) -> int:
+    response = await client.post(
+        "/api/task/",
+        json={"title": title, "description": "Task used by the scheduler tests.", "due_time": due_time},
+        headers=headers
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_publishes_due_tasks(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    scheduler = DueScheduler(TestingSessionLocal, task_events, lookahead=60, batch_size=2, due_status=None)
+    loaded = await create_task(client, headers, "Loaded", due_in(1))
+    later = await create_task(client, headers, "Later", due_in(3600))
+    backlog, queue = task_events.subscribe(1)
+    await scheduler.start()
+    try:
+        # The test database has a single connection, let the first load finish before writing.
+        while loaded not in scheduler.scheduled:
+            await asyncio.sleep(0.01)
+        pushed = await create_task(client, headers, "Pushed", due_in(1))
+        finished = await create_task(client, headers, "Finished", due_in(1))
+        await client.put(f"/api/task/{finished}/", json={"status": "done"}, headers=headers)
+        assert later not in scheduler.scheduled and finished not in scheduler.scheduled
+
+        due = set()
+        while not {loaded, pushed} <= due:
+            event = await asyncio.wait_for(queue.get(), 5)
+            if event["type"] == "task.due":
+                due.add(event["data"]["id"])
+    finally:
+        await scheduler.stop()
+        task_events.unsubscribe(1, queue)
+
+    assert finished not in due and later not in due
+    for task_id in (loaded, later, pushed, finished):
+        await client.delete(f"/api/task/{task_id}/", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_moves_due_tasks_to_status(client, auth_token, db_session):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    scheduler = DueScheduler(TestingSessionLocal, task_events, lookahead=60, batch_size=2, due_status=TaskStatus.IN_PROGRESS)
+    task_ids = [await create_task(client, headers, f"Due {n}", due_in(1)) for n in range(3)]
+
+    await scheduler.fire(task_ids, datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=2))
+
+    statuses = await db_session.scalars(select(Task.status).where(Task.id.in_(task_ids)).execution_options(populate_existing=True))
+    assert set(statuses) == {TaskStatus.IN_PROGRESS}
+    history = await db_session.scalars(
+        select(TaskHistory.status).where(TaskHistory.task_id.in_(task_ids)).order_by(TaskHistory.id)
+    )
+    assert list(history).count(TaskStatus.IN_PROGRESS) == 3
+    for task_id in task_ids:
+        await client.delete(f"/api/task/{task_id}/", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_fires_tasks_that_became_due_before_it_started(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    scheduler = DueScheduler(TestingSessionLocal, task_events, lookahead=60, batch_size=2, due_status=None)
+    overdue = {await create_task(client, headers, f"Overdue {n}", due_in(-3600 * (n + 1))) for n in range(3)}
+    backlog, queue = task_events.subscribe(1)
+    await scheduler.start()
+    try:
+        due = set()
+        while not overdue <= due:
+            event = await asyncio.wait_for(queue.get(), 5)
+            if event["type"] == "task.due":
+                due.add(event["data"]["id"])
+        assert scheduler.backlog is None
+        # Let the first load finish, stopping cancels it on the shared test connection.
+        while scheduler.cursor[0] < utc_now() + timedelta(seconds=30):
+            await asyncio.sleep(0.01)
+    finally:
+        await scheduler.stop()
+        task_events.unsubscribe(1, queue)
+    for task_id in overdue:
+        await client.delete(f"/api/task/{task_id}/", headers=headers)
+
+
+class FailingOnce:
+    """Session maker whose first session fails, like a dropped connection."""
+
+    def __init__(self, session_maker):
+        self.session_maker = session_maker
+        self.failed = False
+
+    def __call__(self):
+        if not self.failed:
+            self.failed = True
+            raise ConnectionError("connection lost")
+        return self.session_maker()
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_fired_on_the_next_pass(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    scheduler = DueScheduler(FailingOnce(TestingSessionLocal), task_events, lookahead=60, batch_size=2, due_status=None)
+    task_ids = [await create_task(client, headers, f"Retried {n}", due_in(-60)) for n in range(3)]
+    for task_id in task_ids:
+        scheduler.push(task_id, utc_now())
+    backlog, queue = task_events.subscribe(1)
+    try:
+        now = utc_now()
+        with pytest.raises(ConnectionError):
+            await scheduler.fire(scheduler.pop_due(now), now)
+        assert sorted(scheduler.scheduled) == sorted(task_ids)
+
+        now = utc_now()
+        await scheduler.fire(scheduler.pop_due(now), now)
+        due = set()
+        while not queue.empty():
+            event = queue.get_nowait()
+            if event["type"] == "task.due":
+                due.add(event["data"]["id"])
+        assert due == set(task_ids) and scheduler.scheduled == {}
+    finally:
+        task_events.unsubscribe(1, queue)
+    for task_id in task_ids:
+        await client.delete(f"/api/task/{task_id}/", headers=headers)
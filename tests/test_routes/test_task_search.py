@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_task_search_is_ranked_and_paginated(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    created = {}
+    for title, description in (
+        ("Invoice reminder", "Send the invoice to the accounting team."),
+        ("Plan invoices", "Invoice invoice invoice, prepare all of them."),
+        ("Buy groceries", "Milk, bread and an invoice printer."),
+        ("Water the plants", "Nothing to see here."),
+    ):
+        response = await client.post(
+            "/api/task/",
+            json={"title": title, "description": description, "due_time": "2040-01-01T12:00:00"},
+            headers=headers
+        )
+        created[title] = response.json()["id"]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "invoice", "limit": 2, "fields": "id,title"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/tasks/", params=params, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    titles = [task["title"] for task in seen]
+    assert sorted(titles) == ["Buy groceries", "Invoice reminder", "Plan invoices"]
+    assert titles[-1] == "Buy groceries"
+
+    response = await client.get("/api/tasks/", params={"q": "accounting invoice"}, headers=headers)
+    assert [task["id"] for task in response.json()["items"]] == [created["Invoice reminder"]]
+
+    await client.put(f"/api/task/{created['Water the plants']}/", json={"description": "Invoice the gardener."}, headers=headers)
+    await client.delete(f"/api/task/{created['Buy groceries']}/", headers=headers)
+    response = await client.get("/api/tasks/", params={"q": "invoice", "status": "new"}, headers=headers)
+    assert created["Water the plants"] in [task["id"] for task in response.json()["items"]]
+    assert created["Buy groceries"] not in [task["id"] for task in response.json()["items"]]
+
+
+@pytest.mark.asyncio
+async def test_task_search_treats_syntax_as_text(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get("/api/tasks/", params={"q": 'invoice" OR NEAR(*'}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+    response = await client.get("/api/tasks/", params={"q": "   "}, headers=headers)
+    assert response.status_code == 400
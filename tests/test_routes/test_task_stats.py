@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_task_stats_follow_task_writes(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    before = (await client.get("/api/tasks/stats/", headers=headers)).json()
+    before_due = (await client.get("/api/tasks/stats/due/", headers=headers)).json()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    created = []
+    for status, due_time in (
+        ("new", now - timedelta(days=1)),
+        ("in_progress", now + timedelta(hours=2)),
+        ("new", now + timedelta(days=3)),
+        ("done", now - timedelta(days=2)),
+    ):
+        response = await client.post(
+            "/api/task/",
+            json={
+                "title": "Stats task",
+                "description": "Task used by the stats tests.",
+                "due_time": due_time.isoformat(),
+                "status": status
+            },
+            headers=headers
+        )
+        created.append(response.json()["id"])
+
+    response = await client.get("/api/tasks/stats/", headers=headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total"] == before["total"] + 4
+    assert stats["by_status"]["new"] == before["by_status"]["new"] + 2
+    assert stats["by_status"]["in_progress"] == before["by_status"]["in_progress"] + 1
+    assert stats["by_status"]["done"] == before["by_status"]["done"] + 1
+    due = (await client.get("/api/tasks/stats/due/", headers=headers)).json()
+    assert due["overdue"] == before_due["overdue"] + 1
+    assert due["due_soon"]["24h"] == before_due["due_soon"]["24h"] + 1
+    assert due["due_soon"]["168h"] == before_due["due_soon"]["168h"] + 2
+
+    await client.put(f"/api/task/{created[0]}/", json={"status": "done"}, headers=headers)
+    await client.put("/api/tasks/bulk/", json=[{"id": created[1], "status": "done"}], headers=headers)
+    await client.post("/api/tasks/bulk/delete/", json={"ids": [created[2]]}, headers=headers)
+    await client.delete(f"/api/task/{created[3]}/", headers=headers)
+
+    stats = (await client.get("/api/tasks/stats/", headers=headers)).json()
+    assert stats["by_status"] == {**before["by_status"], "done": before["by_status"]["done"] + 2}
+    assert stats["total"] == before["total"] + 2
+    assert (await client.get("/api/tasks/stats/due/", headers=headers)).json() == before_due
+
+
+@pytest.mark.asyncio
+async def test_task_stats_never_read_tasks(client, auth_token, statements):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    statements.clear()
+    response = await client.get("/api/tasks/stats/", headers=headers)
+    assert response.status_code == 200
+    assert [statement for statement in statements if "FROM tasks" in statement] == []
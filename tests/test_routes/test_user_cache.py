@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import event
+
+from api.auth import AUTH_MODE, UserManager, user_cache
+from tests.conftest import engine_test
+
+stateless_only = pytest.mark.skipif(AUTH_MODE != "stateless", reason="user cache is only used in stateless auth mode")
+
+
+@stateless_only
+@pytest.mark.asyncio
+async def test_task_routes_resolve_user_from_cache(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_cache.clear()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine_test.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get("/api/tasks/", headers=headers)
+        assert response.status_code == 200
+        assert any("FROM users" in statement for statement in statements)
+
+        statements.clear()
+        response = await client.get("/api/tasks/", headers=headers)
+        assert response.status_code == 200
+        assert not any("FROM users" in statement for statement in statements)
+    finally:
+        event.remove(engine_test.sync_engine, "before_cursor_execute", record)
+
+
+@stateless_only
+@pytest.mark.asyncio
+async def test_user_update_invalidates_cache(client, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.get("/api/tasks/", headers=headers)
+    assert response.status_code == 200
+    user = user_cache.get(1)
+    assert user is not None
+
+    await UserManager(None).on_after_update(user, {"is_active": False})
+
+    assert user_cache.get(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_rejected(client):
+    response = await client.get("/api/tasks/", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+
+    response = await client.get("/api/tasks/")
+    assert response.status_code == 401